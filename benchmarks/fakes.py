@@ -0,0 +1,52 @@
+import itertools
+from types import SimpleNamespace
+
+
+class FakeBot:
+    def __init__(self):
+        self.calls = 0
+        self.get_chat_calls = 0
+        self._message_ids = itertools.count(1)
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(message_id=next(self._message_ids), chat=SimpleNamespace(id=chat_id), text=text)
+
+    async def edit_message_text(self, text: str = None, chat_id: int = None, message_id: int = None, **kwargs):
+        self.calls += 1
+        return True
+
+    async def edit_message_reply_markup(self, chat_id: int = None, message_id: int = None, **kwargs):
+        self.calls += 1
+        return True
+
+    async def get_chat(self, chat_id: int):
+        self.calls += 1
+        self.get_chat_calls += 1
+        return SimpleNamespace(id=chat_id, username=None, first_name=f"Player {chat_id}")
+
+
+def fake_user(user_id: int):
+    return SimpleNamespace(id=user_id, username=None, first_name=f"Player {user_id}")
+
+
+async def _ignore(*args, **kwargs):
+    return None
+
+
+def fake_message(user_id: int, text: str):
+    return SimpleNamespace(
+        text=text,
+        from_user=fake_user(user_id),
+        chat=SimpleNamespace(id=user_id),
+        answer=_ignore
+    )
+
+
+def fake_callback(user_id: int, data: str):
+    return SimpleNamespace(
+        data=data,
+        from_user=fake_user(user_id),
+        message=SimpleNamespace(answer=_ignore),
+        answer=_ignore
+    )
@@ -0,0 +1,471 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+os.environ.setdefault("BOT_TOKEN", "offline-benchmark")
+
+from sqlalchemy import event
+
+import database
+from database import db_manager, seen_questions_cache, profile_cache
+from models import (
+    Player,
+    MatchFactory,
+    QuestionBank,
+    IndexedQuestionBank,
+    compile_answer,
+    is_correct_answer,
+    parse_answer
+)
+from models.question_store import build_index
+from services.matchmaker import plan_pairs
+from services import DeadlineScheduler, InMemoryStateBackend, RankIndex, outbound, scheduler, timer_renderer
+from .fakes import FakeBot, fake_callback, fake_message
+
+DEFAULT_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+BANK_SIZES = (100, 1000, 10000, 50000)
+
+LEVELS = ("easy", "medium", "hard")
+
+
+class RoundTripCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._record)
+        event.listen(engine.sync_engine, "commit", self._record)
+
+    def _record(self, *args, **kwargs):
+        self.count += 1
+
+
+def summarize(name: str, samples: List[float], round_trips: Optional[int] = None, **extra) -> Dict:
+    ordered = sorted(samples)
+    result = {
+        "name": name,
+        "iterations": len(ordered),
+        "mean_us": statistics.fmean(ordered) * 1e6,
+        "p50_us": ordered[len(ordered) // 2] * 1e6,
+        "p95_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1e6,
+        "ops_per_sec": len(ordered) / sum(ordered) if sum(ordered) else None
+    }
+    if round_trips is not None:
+        result["round_trips_per_call"] = round_trips / len(ordered)
+    result.update(extra)
+    return result
+
+
+def bench_sync(name: str, func: Callable, iterations: int, **extra) -> Dict:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    return summarize(name, samples, **extra)
+
+
+async def bench_async(name: str, func: Callable, iterations: int,
+                      counter: Optional[RoundTripCounter] = None,
+                      setup: Optional[Callable] = None, **extra) -> Dict:
+    samples = []
+    round_trips = 0
+    for i in range(iterations):
+        if setup is not None:
+            setup(i)
+        before = counter.count if counter else 0
+        start = time.perf_counter()
+        await func(i)
+        samples.append(time.perf_counter() - start)
+        round_trips += (counter.count - before) if counter else 0
+    return summarize(name, samples, round_trips if counter else None, **extra)
+
+
+def synthetic_bank(size: int) -> Dict[str, List[Dict]]:
+    return {
+        level: [
+            {"id": offset + i, "question": f"Задача {offset + i}", "answer": f"{i % 7 + 1}/{i % 11 + 12}"}
+            for i in range(size)
+        ]
+        for offset, level in ((1_000_000, "easy"), (2_000_000, "medium"), (3_000_000, "hard"))
+    }
+
+
+def bench_answers(iterations: int) -> List[Dict]:
+    cases = [
+        ("fraction", "5/12", "10/24"),
+        ("decimal_comma", "0,992", "0.992"),
+        ("wrong", "1/3", "10/66"),
+        ("text", "не знаю", "1/2"),
+        ("expression", "C(5,2)/C(12,2)", "5/33"),
+        ("huge_exponent", "1e999999", "1"),
+        ("long_digits", "9" * 4000, "1")
+    ]
+    results = [
+        bench_sync(f"is_correct_answer[{label}]", lambda _, a=answer, c=correct: is_correct_answer(a, c), iterations)
+        for label, answer, correct in cases
+    ]
+    results += [
+        bench_sync(f"AnswerKey.matches[{label}]", lambda _, a=answer, k=compile_answer(correct): k.matches(a), iterations)
+        for label, answer, correct in cases
+    ]
+    results += [
+        bench_sync(f"parse_answer[{label}]", lambda _, a=answer: parse_answer(a), iterations)
+        for label, answer, _ in cases
+    ]
+    return results
+
+
+def bench_bank(iterations: int) -> List[Dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in BANK_SIZES:
+            data = synthetic_bank(size)
+            bank = QuestionBank.from_dict(data)
+            index_path = f"{directory}/bank_{size}.sqlite"
+            build_index(data, index_path)
+            indexed = IndexedQuestionBank.open(index_path)
+
+            ids = [question["id"] for question in bank.questions_by_level("easy")]
+            for fraction in (0.5, 0.95):
+                seen = set(random.sample(ids, int(size * fraction)))
+                results.append(bench_sync(
+                    f"QuestionBank.sample_unseen[size={size},seen={fraction}]",
+                    lambda _, s=seen: bank.sample_unseen("easy", s),
+                    iterations
+                ))
+                results.append(bench_sync(
+                    f"IndexedQuestionBank.sample_unseen[size={size},seen={fraction}]",
+                    lambda _, s=seen: indexed.sample_unseen("easy", s),
+                    iterations
+                ))
+                results.append(bench_sync(
+                    f"QuestionBank.has_unseen[size={size},seen={fraction}]",
+                    lambda _, s=seen: bank.has_unseen("easy", s),
+                    iterations
+                ))
+            indexed.close()
+    return results
+
+
+async def bench_select_question(iterations: int, counter: RoundTripCounter, user_ids) -> List[Dict]:
+    results = []
+    for size in BANK_SIZES:
+        MatchFactory._questions = QuestionBank.from_dict(synthetic_bank(size))
+
+        async def select(_):
+            match = MatchFactory.create_match(Player(user_id=next(user_ids)), Player(user_id=next(user_ids)))
+            match.level = "easy"
+            await MatchFactory.select_question(match)
+
+        results.append(await bench_async(f"MatchFactory.select_question[size={size}]", select, iterations, counter))
+    MatchFactory.load_questions()
+    return results
+
+
+async def bench_queue(iterations: int) -> List[Dict]:
+    backend = InMemoryStateBackend()
+    background = 10_000
+    for user_id in range(background):
+        await backend.enqueue(Player(user_id=user_id), LEVELS[user_id % len(LEVELS)])
+
+    results = [
+        await bench_async(
+            "queue.enqueue+cancel",
+            lambda i: _enqueue_cancel(backend, background + i),
+            iterations,
+            depth=background
+        ),
+        await bench_async(
+            "queue.is_queued",
+            lambda i: backend.is_queued(i % (background * 2)),
+            iterations,
+            depth=background
+        ),
+        await bench_async(
+            "queue.enqueue+pop_pair",
+            lambda i: _enqueue_pair(backend, background * 2 + i * 2),
+            iterations,
+            depth=background
+        )
+    ]
+    return results
+
+
+async def bench_scheduler(iterations: int) -> List[Dict]:
+    deadlines = DeadlineScheduler()
+    background = 10_000
+
+    async def noop():
+        return None
+
+    for i in range(background):
+        deadlines.schedule(("match", i), 3600 + i, noop)
+
+    def schedule_cancel(i):
+        deadlines.schedule(("rematch", i), 20, noop)
+        deadlines.cancel(("rematch", i))
+
+    result = bench_sync("scheduler.schedule+cancel", schedule_cancel, iterations, pending=background)
+    deadlines.stop()
+    return [result]
+
+
+def bench_matchmaking(iterations: int) -> List[Dict]:
+    rng = random.Random(0)
+    waiting = 2_000
+    candidates = [
+        (Player(user_id=user_id, rating=rng.randint(0, 3000)), "easy", rng.uniform(0, 120))
+        for user_id in range(waiting)
+    ]
+    result = bench_sync("matchmaker.plan_pairs", lambda i: plan_pairs(candidates), max(iterations // 10, 5), waiting=waiting)
+    result["pairs"] = len(plan_pairs(candidates))
+    return [result]
+
+
+def bench_rank_index(iterations: int) -> List[Dict]:
+    players = 100_000
+    rng = random.Random(0)
+    index = RankIndex.build((user_id, rng.randint(0, 3000)) for user_id in range(players))
+    return [
+        bench_sync("rank_index.update", lambda i: index.update(i % players, rng.randint(0, 3000)), iterations, players=players),
+        bench_sync("rank_index.rank", lambda i: index.rank((i * 7919) % players), iterations, players=players),
+        bench_sync("rank_index.page", lambda i: index.page((i * 7919) % players, 10), iterations, players=players),
+        bench_sync("rank_index.around", lambda i: index.around((i * 7919) % players, 5), iterations, players=players)
+    ]
+
+
+def bench_elo_replay(iterations: int) -> List[Dict]:
+    try:
+        import numpy as np
+        from jobs.ratings import replay_elo
+    except ImportError:
+        return []
+
+    matches = 100_000
+    players = 20_000
+    generator = np.random.default_rng(0)
+    first = generator.integers(0, players, matches)
+    second = (first + generator.integers(1, players, matches)) % players
+    scores = generator.choice([0.0, 0.5, 1.0], matches)
+    ratings = np.full(players, 1000.0)
+    result = bench_sync(
+        "elo.replay[100k matches]",
+        lambda i: replay_elo(ratings, first, second, scores),
+        max(iterations // 20, 3),
+        matches=matches,
+        players=players
+    )
+    result["matches_per_sec"] = matches / (result["mean_us"] / 1e6)
+    return [result]
+
+
+async def _enqueue_cancel(backend: InMemoryStateBackend, user_id: int):
+    await backend.enqueue(Player(user_id=user_id), "easy")
+    await backend.cancel_queue(user_id)
+
+
+async def _enqueue_pair(backend: InMemoryStateBackend, user_id: int):
+    await backend.enqueue(Player(user_id=user_id), "medium")
+    await backend.enqueue(Player(user_id=user_id + 1), "medium")
+    await backend.pop_pair("medium")
+
+
+async def bench_repository(iterations: int, counter: RoundTripCounter, user_ids) -> List[Dict]:
+    existing = [next(user_ids) for _ in range(100)]
+    for user_id in existing:
+        await database.get_player_rating(user_id)
+
+    def pick(i):
+        return existing[i % len(existing)]
+
+    results = [
+        await bench_async("get_player_rating[existing]", lambda i: database.get_player_rating(pick(i)), iterations, counter),
+        await bench_async("get_player_rating[new]", lambda i: database.get_player_rating(next(user_ids)), iterations, counter),
+        await bench_async("get_player_stats", lambda i: database.get_player_stats(pick(i)), iterations, counter),
+        await bench_async(
+            "get_player_stats[cold]",
+            lambda i: database.get_player_stats(pick(i)),
+            iterations,
+            counter,
+            setup=lambda _: profile_cache.clear()
+        ),
+        await bench_async("update_player_rating", lambda i: database.update_player_rating(pick(i), 5), iterations, counter),
+        await bench_async("increment_game_counter", lambda i: database.increment_game_counter(pick(i)), iterations, counter),
+        await bench_async("increment_win_counter", lambda i: database.increment_win_counter(pick(i), "easy"), iterations, counter),
+        await bench_async(
+            "mark_question_used",
+            lambda i: database.mark_question_used(pick(i), 10_000 + i, "easy"),
+            iterations,
+            counter
+        ),
+        await bench_async(
+            "fetch_seen_question_ids[cold]",
+            lambda i: database.fetch_seen_question_ids(pick(i), "easy"),
+            iterations,
+            counter,
+            setup=lambda _: seen_questions_cache.clear()
+        )
+    ]
+
+    for user_id in existing:
+        await database.fetch_seen_question_ids(user_id, "easy")
+    results.append(await bench_async(
+        "fetch_seen_question_ids[cached]",
+        lambda i: database.fetch_seen_question_ids(pick(i), "easy"),
+        iterations,
+        counter
+    ))
+
+    results += [
+        await bench_async("get_leaderboard", lambda i: database.get_leaderboard(10), iterations, counter),
+        await bench_async(
+            "settle_match",
+            lambda i: database.settle_match(pick(i), pick(i + 1), LEVELS[i % len(LEVELS)]),
+            iterations,
+            counter
+        ),
+        await bench_async("settle_draw", lambda i: database.settle_draw(pick(i), pick(i + 1)), iterations, counter)
+    ]
+    return results
+
+
+async def bench_cycle(iterations: int, counter: RoundTripCounter, bot: FakeBot, user_ids) -> List[Dict]:
+    from handlers import common, match, rematch
+    from services import state
+
+    async def cycle(_):
+        first, second = next(user_ids), next(user_ids)
+        await common.select_level(fake_callback(first, "level_easy"))
+        await common.select_level(fake_callback(second, "level_easy"))
+        current = await state.get_player_match(first)
+        await match.process_answer(fake_message(first, current.correct_answer))
+        await outbound.close()
+
+    before = bot.calls
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = await bench_async("cycle[join->match->answer->settle]", cycle, iterations, counter)
+    result["telegram_calls_per_call"] = (bot.calls - before) / iterations
+
+    samples = []
+    round_trips = 0
+    get_chat_calls = bot.get_chat_calls
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(iterations):
+            first, second = next(user_ids), next(user_ids)
+            await common.select_level(fake_callback(first, "level_easy"))
+            await common.select_level(fake_callback(second, "level_easy"))
+            current = await state.get_player_match(first)
+            await match.process_answer(fake_message(first, current.correct_answer))
+            await outbound.close()
+
+            key = f"{min(first, second)}_{max(first, second)}"
+            before = counter.count
+            start = time.perf_counter()
+            await rematch.process_rematch_request(fake_callback(first, f"rematch:{key}"))
+            await rematch.process_rematch_request(fake_callback(second, f"rematch:{key}"))
+            samples.append(time.perf_counter() - start)
+            round_trips += counter.count - before
+
+            current = await state.get_player_match(first)
+            if current is not None:
+                await match.process_answer(fake_message(first, current.correct_answer))
+            await outbound.close()
+    rematch_result = summarize("rematch[accept->match]", samples, round_trips)
+    rematch_result["get_chat_per_call"] = (bot.get_chat_calls - get_chat_calls) / iterations
+
+    scheduler.stop()
+    timer_renderer.stop()
+    return [result, rematch_result]
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict, baseline_path: str) -> None:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {result["name"]: result for result in json.load(f)["results"]}
+    for result in current["results"]:
+        previous = baseline.get(result["name"])
+        if previous is None:
+            continue
+        ratio = result["mean_us"] / previous["mean_us"] if previous["mean_us"] else float("inf")
+        print(f"{result['name']:<60} {previous['mean_us']:>12.1f}us -> {result['mean_us']:>12.1f}us  x{ratio:.2f}",
+              file=sys.stderr)
+
+
+async def run(args) -> Dict:
+    random.seed(args.seed)
+    await database.init_db(args.database_url)
+    counter = RoundTripCounter(db_manager.engine)
+
+    bot = FakeBot()
+    from handlers import common_router, match_router, rematch_router
+    for router in (common_router, match_router, rematch_router):
+        router.bot = bot
+    outbound.bot = bot
+    outbound.set_limits(global_rate=1e9, global_burst=1e9, chat_rate=1e9, chat_burst=1e9)
+    MatchFactory.load_questions()
+
+    user_ids = iter(range(10_000_000, 20_000_000))
+    results = []
+    results += bench_answers(args.iterations * 10)
+    results += bench_bank(args.iterations * 10)
+    results += await bench_queue(args.iterations * 10)
+    results += await bench_scheduler(args.iterations * 10)
+    results += bench_rank_index(args.iterations * 10)
+    results += bench_matchmaking(args.iterations)
+    results += bench_elo_replay(args.iterations)
+    results += await bench_repository(args.iterations, counter, user_ids)
+    results += await bench_select_question(args.iterations, counter, user_ids)
+    results += await bench_cycle(args.iterations, counter, bot, user_ids)
+
+    dialect = db_manager.dialect_name
+    await db_manager.close()
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "database": dialect,
+        "iterations": args.iterations,
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline microbenchmarks for BattleStudy hot paths")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+STARTED = time.perf_counter()
+
+PHASES = ("import", "dispatcher", "services", "first_update")
+
+
+async def child(report_path: str) -> None:
+    phases: Dict[str, float] = {}
+    mark = time.perf_counter()
+
+    import main
+    from datetime import datetime
+    from aiogram import Bot
+    from aiogram.client.session.base import BaseSession
+    from aiogram.methods import SendMessage
+    from aiogram.types import Chat, Message, Update, User
+
+    phases["import"] = time.perf_counter() - mark
+
+    class OfflineSession(BaseSession):
+        def __init__(self):
+            super().__init__()
+            self.calls = 0
+            self._message_ids = itertools.count(1)
+
+        async def make_request(self, bot, method, timeout=None):
+            self.calls += 1
+            if isinstance(method, SendMessage):
+                return Message(
+                    message_id=next(self._message_ids),
+                    date=datetime.now(),
+                    chat=Chat(id=method.chat_id, type="private"),
+                    text=method.text
+                )
+            return True
+
+        async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+            yield b""
+
+        async def close(self):
+            pass
+
+    mark = time.perf_counter()
+    session = OfflineSession()
+    bot = Bot(token=os.environ["BOT_TOKEN"], session=session)
+    dp = main.create_dispatcher(bot)
+    phases["dispatcher"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    await main.start_services()
+    phases["services"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    user = User(id=1, is_bot=False, first_name="Player")
+    update = Update(
+        update_id=1,
+        message=Message(
+            message_id=1,
+            date=datetime.now(),
+            chat=Chat(id=1, type="private"),
+            from_user=user,
+            text="/start"
+        )
+    )
+    await dp.feed_update(bot, update)
+    phases["first_update"] = time.perf_counter() - mark
+    phases["total"] = time.perf_counter() - STARTED
+
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump({"phases": phases, "telegram_calls": session.calls}, f)
+
+    await main.shutdown()
+
+
+def spawn(workdir: str, env: Dict[str, str]) -> Dict:
+    report_path = os.path.join(workdir, "report.json")
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child", report_path],
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    wall = time.perf_counter() - started
+    with open(report_path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    report["wall"] = wall
+    return report
+
+
+def summarize(name: str, reports: List[Dict]) -> Dict:
+    result = {"name": name, "runs": len(reports)}
+    for phase in PHASES + ("total",):
+        samples = sorted(report["phases"][phase] for report in reports)
+        result[f"{phase}_ms"] = statistics.median(samples) * 1e3
+    result["process_wall_ms"] = statistics.median(report["wall"] for report in reports) * 1e3
+    result["telegram_calls"] = statistics.median(report["telegram_calls"] for report in reports)
+    return result
+
+
+def run(args) -> Dict:
+    workdir = tempfile.mkdtemp(prefix="battlestudy-startup-")
+    try:
+        env = dict(
+            os.environ,
+            BOT_TOKEN="42:offline-benchmark",
+            DATABASE_URL=args.database_url or f"sqlite+aiosqlite:///{os.path.join(workdir, 'bot.db')}",
+            QUESTIONS_INDEX_DIR=os.path.join(workdir, "index"),
+            QUESTIONS_RELOAD_INTERVAL="0",
+            STATE_SNAPSHOT_PATH=os.path.join(workdir, "state.json"),
+            STATE_SNAPSHOT_INTERVAL="0",
+            METRICS_ENABLED="false"
+        )
+
+        cold = []
+        for _ in range(args.runs):
+            if args.database_url is None:
+                for name in ("bot.db", "index", "state.json"):
+                    path = os.path.join(workdir, name)
+                    if os.path.isdir(path):
+                        shutil.rmtree(path)
+                    elif os.path.exists(path):
+                        os.remove(path)
+            cold.append(spawn(workdir, env))
+
+        warm = [spawn(workdir, env) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "python": platform.python_version(),
+        "runs": args.runs,
+        "results": [summarize("startup[cold]", cold), summarize("startup[warm]", warm)]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start-to-first-update benchmark for BattleStudy")
+    parser.add_argument("--database-url", help="benchmark against this database instead of a fresh SQLite file")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child(args.child))
+        return
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,11 +15,61 @@ def get_optional_env(key: str, default: Any) -> Any:
 
 BOT_TOKEN: str = get_required_env("BOT_TOKEN")
 
+BOT_MODE: str = get_optional_env("BOT_MODE", "polling")
+
+WEBHOOK_BASE_URL: str = get_optional_env("WEBHOOK_BASE_URL", "")
+WEBHOOK_PATH: str = get_optional_env("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET: str = get_optional_env("WEBHOOK_SECRET", "")
+WEBAPP_HOST: str = get_optional_env("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT: int = int(get_optional_env("WEBAPP_PORT", 8080))
+
+if BOT_MODE == "webhook" and not (WEBHOOK_BASE_URL and WEBHOOK_SECRET):
+    raise ValueError("WEBHOOK_BASE_URL and WEBHOOK_SECRET must be set when BOT_MODE is 'webhook'")
+
 DB_HOST: str = get_optional_env("DB_HOST", "localhost")
 DB_PORT: int = int(get_optional_env("DB_PORT", 5432))
 DB_NAME: str = get_optional_env("DB_NAME", "battlestudy")
 DB_USER: str = get_optional_env("DB_USER", "postgres")
 DB_PASS: str = get_optional_env("DB_PASS", "postgres")
+DATABASE_URL: str = get_optional_env("DATABASE_URL", "")
+
+DB_POOL_SIZE: int = int(get_optional_env("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW: int = int(get_optional_env("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT: float = float(get_optional_env("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE: int = int(get_optional_env("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING: bool = str(get_optional_env("DB_POOL_PRE_PING", "true")).lower() in ("1", "true", "yes")
+DB_STATEMENT_CACHE_SIZE: int = int(get_optional_env("DB_STATEMENT_CACHE_SIZE", 100))
+DB_AUTO_MIGRATE: bool = str(get_optional_env("DB_AUTO_MIGRATE", "true")).lower() in ("1", "true", "yes")
+
+TOP_PLAYERS_LIMIT: int = 10
+LEADERBOARD_NAME_CACHE_SIZE: int = int(get_optional_env("LEADERBOARD_NAME_CACHE_SIZE", 10000))
+
+STATE_BACKEND: str = get_optional_env("STATE_BACKEND", "memory")
+REDIS_URL: str = get_optional_env("REDIS_URL", "redis://localhost:6379/0")
+STATE_KEY_PREFIX: str = get_optional_env("STATE_KEY_PREFIX", "battlestudy")
+STATE_SNAPSHOT_PATH: str = get_optional_env("STATE_SNAPSHOT_PATH", ".state_snapshot.json")
+STATE_SNAPSHOT_INTERVAL: float = float(get_optional_env("STATE_SNAPSHOT_INTERVAL", 10.0))
+STATE_SNAPSHOT_MAX_AGE: float = float(get_optional_env("STATE_SNAPSHOT_MAX_AGE", 900))
+
+METRICS_ENABLED: bool = str(get_optional_env("METRICS_ENABLED", "false")).lower() in ("1", "true", "yes")
+METRICS_HOST: str = get_optional_env("METRICS_HOST", "127.0.0.1")
+METRICS_PORT: int = int(get_optional_env("METRICS_PORT", 9105))
+
+SEEN_CACHE_SIZE: int = int(get_optional_env("SEEN_CACHE_SIZE", 10000))
+SEEN_CACHE_TTL: float = float(get_optional_env("SEEN_CACHE_TTL", 300))
+
+QUESTIONS_PATH: str = get_optional_env("QUESTIONS_PATH", "questions.json")
+QUESTION_STORE: str = get_optional_env("QUESTION_STORE", "sqlite")
+QUESTIONS_INDEX_DIR: str = get_optional_env("QUESTIONS_INDEX_DIR", ".question_index")
+QUESTIONS_RELOAD_INTERVAL: float = float(get_optional_env("QUESTIONS_RELOAD_INTERVAL", 5.0))
+QUESTION_TEXT_CACHE_SIZE: int = int(get_optional_env("QUESTION_TEXT_CACHE_SIZE", 256))
+
+PROFILE_CACHE_SIZE: int = int(get_optional_env("PROFILE_CACHE_SIZE", 10000))
+PROFILE_CACHE_TTL: float = float(get_optional_env("PROFILE_CACHE_TTL", 300))
+
+MATCH_RESULTS_BATCH_SIZE: int = int(get_optional_env("MATCH_RESULTS_BATCH_SIZE", 100))
+MATCH_RESULTS_FLUSH_INTERVAL: float = float(get_optional_env("MATCH_RESULTS_FLUSH_INTERVAL", 2.0))
+MATCH_RESULTS_MAX_BUFFER: int = int(get_optional_env("MATCH_RESULTS_MAX_BUFFER", 10000))
 
 TIMEOUT_SETTINGS: Dict[str, int] = {
     "easy": 60,
@@ -27,8 +77,35 @@ TIMEOUT_SETTINGS: Dict[str, int] = {
     "hard": 300
 }
 
+OUTBOUND_GLOBAL_RATE: float = float(get_optional_env("OUTBOUND_GLOBAL_RATE", 30))
+OUTBOUND_GLOBAL_BURST: float = float(get_optional_env("OUTBOUND_GLOBAL_BURST", 30))
+OUTBOUND_CHAT_RATE: float = float(get_optional_env("OUTBOUND_CHAT_RATE", 1))
+OUTBOUND_CHAT_BURST: float = float(get_optional_env("OUTBOUND_CHAT_BURST", 3))
+OUTBOUND_MAX_RETRIES: int = int(get_optional_env("OUTBOUND_MAX_RETRIES", 3))
+
+MATCHMAKING_INTERVAL: float = float(get_optional_env("MATCHMAKING_INTERVAL", 1.0))
+MATCH_RATING_WINDOW: int = int(get_optional_env("MATCH_RATING_WINDOW", 50))
+MATCH_RATING_WINDOW_GROWTH: float = float(get_optional_env("MATCH_RATING_WINDOW_GROWTH", 5.0))
+MATCH_RATING_WINDOW_MAX: int = int(get_optional_env("MATCH_RATING_WINDOW_MAX", 1000))
+MATCH_LEVEL_FALLBACK_AFTER: float = float(get_optional_env("MATCH_LEVEL_FALLBACK_AFTER", 60.0))
+TIME_TO_MATCH_SAMPLES: int = int(get_optional_env("TIME_TO_MATCH_SAMPLES", 1000))
+
+TIMER_TICK_SECONDS: float = float(get_optional_env("TIMER_TICK_SECONDS", 1.0))
+
+TIMER_MAX_EDITS_PER_TICK: int = int(get_optional_env("TIMER_MAX_EDITS_PER_TICK", 25))
+
+TIMER_CADENCE: List[Tuple[int, int]] = [
+    (120, 60),
+    (30, 15),
+    (0, 5)
+]
+
 RATING_CHANGES: Dict[str, Dict[str, int]] = {
     "easy": {"win": 10, "lose": -5},
     "medium": {"win": 25, "lose": -15},
     "hard": {"win": 50, "lose": -35}
-}
\ No newline at end of file
+}
+
+ELO_INITIAL_RATING: int = int(get_optional_env("ELO_INITIAL_RATING", 1000))
+ELO_K_FACTOR: float = float(get_optional_env("ELO_K_FACTOR", 32))
+RATING_JOB_CHUNK_SIZE: int = int(get_optional_env("RATING_JOB_CHUNK_SIZE", 10000))
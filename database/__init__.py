@@ -1,25 +1,41 @@
 from .connection import db_manager
+from .cache import seen_questions_cache, profile_cache
+from .results import MatchResultWriter, result_writer, OUTCOME_SOLVED, OUTCOME_TIMEOUT
 from .repository import (
     init_db,
     get_player_rating,
     update_player_rating,
     fetch_seen_question_ids,
     mark_question_used,
+    mark_questions_used,
     get_leaderboard,
+    get_all_ratings,
     get_player_stats,
     increment_win_counter,
-    increment_game_counter
+    increment_game_counter,
+    settle_match,
+    settle_draw
 )
 
 __all__ = [
     'db_manager',
+    'seen_questions_cache',
+    'profile_cache',
+    'MatchResultWriter',
+    'result_writer',
+    'OUTCOME_SOLVED',
+    'OUTCOME_TIMEOUT',
     'init_db',
     'get_player_rating', 
     'update_player_rating',
     'fetch_seen_question_ids',
     'mark_question_used',
+    'mark_questions_used',
     'get_leaderboard',
+    'get_all_ratings',
     'get_player_stats',
     'increment_win_counter',
-    'increment_game_counter'
+    'increment_game_counter',
+    'settle_match',
+    'settle_draw'
 ]
\ No newline at end of file
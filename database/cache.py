@@ -0,0 +1,130 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+from config import SEEN_CACHE_SIZE, SEEN_CACHE_TTL, PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL, STATE_BACKEND
+
+
+class SeenQuestionsCache:
+    def __init__(self, max_size: int = SEEN_CACHE_SIZE, ttl: float = SEEN_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Tuple[int, str], Tuple[float, Set[int], bool]] = OrderedDict()
+
+    def _live(self, key: Tuple[int, str]) -> Optional[Tuple[float, Set[int], bool]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry
+
+    def _store(self, key: Tuple[int, str], seen: Set[int], complete: bool) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, seen, complete)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, user_id: int, level: str) -> Optional[Set[int]]:
+        key = (user_id, level)
+        entry = self._live(key)
+        if entry is None or not entry[2]:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, user_id: int, level: str, seen: Set[int]) -> None:
+        key = (user_id, level)
+        entry = self._live(key)
+        self._store(key, set(seen) | entry[1] if entry is not None else set(seen), True)
+
+    def add(self, user_id: int, level: str, question_id: int) -> None:
+        key = (user_id, level)
+        entry = self._live(key)
+        if entry is None:
+            self._store(key, {question_id}, False)
+        else:
+            entry[1].add(question_id)
+
+    def invalidate(self, user_id: int, level: Optional[str] = None) -> None:
+        if level is not None:
+            self._entries.pop((user_id, level), None)
+            return
+        for key in [key for key in self._entries if key[0] == user_id]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+class PlayerProfileCache:
+    def __init__(self, max_size: int = PROFILE_CACHE_SIZE, ttl: float = PROFILE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[int, Tuple[float, Dict[str, int]]] = OrderedDict()
+
+    def _live(self, user_id: int) -> Optional[Dict[str, int]]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, profile = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        return profile
+
+    def get(self, user_id: int) -> Optional[Dict[str, int]]:
+        profile = self._live(user_id)
+        if profile is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(user_id)
+        return profile
+
+    def put(self, user_id: int, profile: Dict[str, int]) -> None:
+        self._entries[user_id] = (time.monotonic() + self.ttl, dict(profile))
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def update(self, user_id: int, **fields: int) -> None:
+        profile = self._live(user_id)
+        if profile is not None:
+            profile.update(fields)
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+seen_questions_cache = SeenQuestionsCache(max_size=SEEN_CACHE_SIZE if STATE_BACKEND == "memory" else 0)
+profile_cache = PlayerProfileCache()
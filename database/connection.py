@@ -1,33 +1,123 @@
+import asyncio
+import time
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from typing import Optional, AsyncGenerator
+from typing import Optional, AsyncGenerator, Dict, Any
 from contextlib import asynccontextmanager
-from config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASS
-from .models import Base
+from config import (
+    DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASS, DATABASE_URL,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_CACHE_SIZE
+)
+from .migrations import ensure_schema
+
+
+def default_database_url() -> str:
+    return DATABASE_URL or f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
 
 class DatabaseManager:
-    _instance: Optional['DatabaseManager'] = None 
+    _instance: Optional['DatabaseManager'] = None
     _engine = None
     _async_session_maker = None
 
     def __new__(cls) -> 'DatabaseManager':
         if cls._instance is None:
             cls._instance = super(DatabaseManager, cls).__new__(cls)
+            cls._instance.reset_pool_stats()
         return cls._instance
 
-    async def init_db(self) -> None:
-        database_url = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    @property
+    def engine(self):
+        return self._engine
+
+    @property
+    def dialect_name(self) -> Optional[str]:
+        return self._engine.dialect.name if self._engine is not None else None
+
+    def _engine_options(self, database_url: str) -> Dict[str, Any]:
+        url = make_url(database_url)
+        options: Dict[str, Any] = {"echo": False, "pool_pre_ping": DB_POOL_PRE_PING}
+
+        if url.get_backend_name() == "sqlite":
+            return options
+
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE
+        )
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+        return options
+
+    def _engine_url(self, database_url: str):
+        url = make_url(database_url)
+        if url.get_driver_name() == "asyncpg" and "prepared_statement_cache_size" not in url.query:
+            url = url.update_query_dict({"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)})
+        return url
+
+    async def init_db(self, database_url: Optional[str] = None) -> None:
+        if database_url is None:
+            database_url = default_database_url()
 
         self._engine = create_async_engine(
-            database_url,
-            echo=False,
+            self._engine_url(database_url),
+            **self._engine_options(database_url)
         )
 
         self._async_session_maker = async_sessionmaker(
             self._engine, expire_on_commit=False
         )
 
-        async with self._engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+        await ensure_schema(self._engine)
+
+        self.reset_pool_stats()
+        await self.warm_up()
+
+    async def warm_up(self, size: Optional[int] = None) -> int:
+        pool = self._engine.pool
+        if size is None:
+            size = pool.size() if hasattr(pool, "size") else 0
+        if size <= 0:
+            return 0
+
+        connections = await asyncio.gather(*(self._engine.connect() for _ in range(size)))
+        await asyncio.gather(*(connection.close() for connection in connections))
+        return size
+
+    def reset_pool_stats(self) -> None:
+        self._checkouts = 0
+        self._checkout_wait_total = 0.0
+        self._checkout_wait_max = 0.0
+        self._checkout_timeouts = 0
+
+    def _record_checkout(self, waited: float) -> None:
+        self._checkouts += 1
+        self._checkout_wait_total += waited
+        if waited > self._checkout_wait_max:
+            self._checkout_wait_max = waited
+
+    def pool_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "checkouts": self._checkouts,
+            "checkout_wait_avg": self._checkout_wait_total / self._checkouts if self._checkouts else 0.0,
+            "checkout_wait_max": self._checkout_wait_max,
+            "checkout_timeouts": self._checkout_timeouts
+        }
+        pool = self._engine.pool if self._engine is not None else None
+        if pool is not None and hasattr(pool, "checkedout"):
+            capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                idle=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                capacity=capacity,
+                saturation=pool.checkedout() / capacity if capacity else 0.0
+            )
+        return stats
 
     async def close(self) -> None:
         if self._engine is not None:
@@ -39,9 +129,16 @@ class DatabaseManager:
     async def session(self) -> AsyncGenerator[AsyncSession, None]:
         if self._async_session_maker is None:
             raise ValueError("Database is not initialized. Call init_db() first.")
-            
+
         session = self._async_session_maker()
         try:
+            started = time.perf_counter()
+            try:
+                await session.connection()
+            except exc.TimeoutError:
+                self._checkout_timeouts += 1
+                raise
+            self._record_checkout(time.perf_counter() - started)
             yield session
         except Exception:
             await session.rollback()
@@ -49,4 +146,4 @@ class DatabaseManager:
         finally:
             await session.close()
 
-db_manager = DatabaseManager()
\ No newline at end of file
+db_manager = DatabaseManager()
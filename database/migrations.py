@@ -0,0 +1,61 @@
+import logging
+import os
+from typing import Optional
+from sqlalchemy import exc, text
+from config import DB_AUTO_MIGRATE
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_REVISION = "0003"
+
+LEGACY_REVISIONS = (
+    ("match_results", "0002"),
+    ("players", "0001")
+)
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+async def current_revision(engine) -> Optional[str]:
+    async with engine.connect() as connection:
+        try:
+            result = await connection.execute(text("SELECT version_num FROM alembic_version"))
+        except exc.DBAPIError:
+            await connection.rollback()
+            return None
+        return result.scalar()
+
+
+def _upgrade(connection, revision: Optional[str]) -> None:
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import inspect
+
+    config = Config(ALEMBIC_INI)
+    config.attributes["connection"] = connection
+    if revision is None:
+        inspector = inspect(connection)
+        for table, legacy_revision in LEGACY_REVISIONS:
+            if inspector.has_table(table):
+                command.stamp(config, legacy_revision)
+                break
+    command.upgrade(config, "head")
+
+
+async def ensure_schema(engine, auto_migrate: bool = DB_AUTO_MIGRATE) -> Optional[str]:
+    revision = await current_revision(engine)
+    if revision == SCHEMA_REVISION:
+        return None
+    if not auto_migrate:
+        raise SchemaVersionError(
+            f"Database schema is at revision {revision}, expected {SCHEMA_REVISION}. Run `alembic upgrade head`."
+        )
+
+    logger.info("Migrating database schema from %s to %s", revision, SCHEMA_REVISION)
+    async with engine.begin() as connection:
+        await connection.run_sync(_upgrade, revision)
+    return revision or "empty"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Float, ForeignKey, Index, func
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase, relationship
 from datetime import datetime
@@ -12,6 +12,7 @@ class Player(Base):
     __tablename__ = "players"
     user_id = Column(BigInteger, primary_key=True)
     rating = Column(Integer, default=0, nullable=False)
+    elo_rating = Column(Integer, nullable=True)
     wins_easy = Column(Integer, default=0, nullable=False)
     wins_medium = Column(Integer, default=0, nullable=False)
     wins_hard = Column(Integer, default=0, nullable=False)
@@ -35,4 +36,24 @@ class UserQuestion(Base):
     level = Column(String, nullable=False)
     used_at = Column(DateTime, default=datetime.now)
     
-    player = relationship("Player", back_populates="questions")
\ No newline at end of file
+    player = relationship("Player", back_populates="questions")
+
+
+class MatchResult(Base):
+    __tablename__ = "match_results"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    match_id = Column(String, nullable=False)
+    player1_id = Column(BigInteger, nullable=False)
+    player2_id = Column(BigInteger, nullable=False)
+    level = Column(String, nullable=False)
+    question_id = Column(Integer, nullable=True)
+    winner_id = Column(BigInteger, nullable=True)
+    outcome = Column(String, nullable=False)
+    solve_seconds = Column(Float, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_match_results_question_id", "question_id"),
+        Index("ix_match_results_level_finished_at", "level", "finished_at"),
+    )
@@ -1,10 +1,32 @@
-from typing import Set, List, Tuple, Dict
-from sqlalchemy import select, update, func, exists
+from typing import Set, List, Tuple, Dict, Optional, Iterable
+from sqlalchemy import select, update, exists, case
+from config import RATING_CHANGES
 from .connection import db_manager
+from .cache import seen_questions_cache, profile_cache
 from .models import Player, UserQuestion
 
-async def init_db() -> None:
-    await db_manager.init_db()
+async def init_db(database_url: Optional[str] = None) -> None:
+    await db_manager.init_db(database_url)
+
+
+def _insert(table):
+    if db_manager.dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(table)
+
+
+def _clamp_rating(expression):
+    return case((expression < 0, 0), else_=expression)
+
+
+PROFILE_COLUMNS = (Player.rating, Player.wins_easy, Player.wins_medium, Player.wins_hard, Player.total_games)
+
+
+def _profile(player) -> Dict[str, int]:
+    return {column.key: getattr(player, column.key) for column in PROFILE_COLUMNS}
+
 
 async def _ensure_player_exists(session, user_id: int) -> Player:
     stmt = select(Player).where(Player.user_id == user_id)
@@ -19,10 +41,22 @@ async def _ensure_player_exists(session, user_id: int) -> Player:
     return player
 
 
-async def get_player_rating(user_id: int) -> int:
+async def _load_profile(user_id: int) -> Dict[str, int]:
+    profile = profile_cache.get(user_id)
+    if profile is not None:
+        return profile
+
     async with db_manager.session() as session:
         player = await _ensure_player_exists(session, user_id)
-        return player.rating
+        profile = _profile(player)
+
+    profile_cache.put(user_id, profile)
+    return profile
+
+
+async def get_player_rating(user_id: int) -> int:
+    profile = await _load_profile(user_id)
+    return profile["rating"]
 
 
 async def update_player_rating(user_id: int, delta: int) -> int:
@@ -35,45 +69,66 @@ async def update_player_rating(user_id: int, delta: int) -> int:
             player = Player(user_id=user_id, rating=max(0, delta))
             session.add(player)
             await session.commit()
+            profile_cache.put(user_id, _profile(player))
             return max(0, delta)
         else:
             stmt = update(Player).where(Player.user_id == user_id).values(
-                rating=func.greatest(0, Player.rating + delta)
+                rating=_clamp_rating(Player.rating + delta)
             ).returning(Player.rating)
             result = await session.execute(stmt)
             await session.commit()
-            return result.scalar_one()
+            rating = result.scalar_one()
+            profile_cache.update(user_id, rating=rating)
+            return rating
 
 
 async def fetch_seen_question_ids(user_id: int, level: str) -> Set[int]:
+    seen = seen_questions_cache.get(user_id, level)
+    if seen is not None:
+        return set(seen)
+
     async with db_manager.session() as session:
         stmt = select(UserQuestion.question_id).where(
             UserQuestion.user_id == user_id,
             UserQuestion.level == level
         )
         result = await session.execute(stmt)
-        return {row[0] for row in result.all()}
+        seen = {row[0] for row in result.all()}
 
+    seen_questions_cache.put(user_id, level, seen)
+    return set(seen)
+
+
+async def mark_questions_used(entries: Iterable[Tuple[int, int, str]]) -> None:
+    entries = list(dict.fromkeys(entries))
+    if not entries:
+        return
+
+    missing_players = [
+        user_id for user_id in sorted({user_id for user_id, _, _ in entries})
+        if profile_cache.get(user_id) is None
+    ]
 
-async def mark_question_used(user_id: int, question_id: int, level: str) -> None:
     async with db_manager.session() as session:
-        await _ensure_player_exists(session, user_id)
-        
-        stmt = select(exists().where(
-            UserQuestion.user_id == user_id,
-            UserQuestion.question_id == question_id
-        ))
-        result = await session.execute(stmt)
-        exists_record = result.scalar()
-        
-        if not exists_record:
-            user_question = UserQuestion(
-                user_id=user_id,
-                question_id=question_id,
-                level=level
-            )
-            session.add(user_question)
-            await session.commit()
+        if missing_players:
+            stmt = _insert(Player).values([
+                {"user_id": user_id, "rating": 0} for user_id in missing_players
+            ]).on_conflict_do_nothing(index_elements=[Player.user_id])
+            await session.execute(stmt)
+
+        stmt = _insert(UserQuestion).values([
+            {"user_id": user_id, "question_id": question_id, "level": level}
+            for user_id, question_id, level in entries
+        ]).on_conflict_do_nothing(index_elements=[UserQuestion.user_id, UserQuestion.question_id])
+        await session.execute(stmt)
+        await session.commit()
+
+    for user_id, question_id, level in entries:
+        seen_questions_cache.add(user_id, level, question_id)
+
+
+async def mark_question_used(user_id: int, question_id: int, level: str) -> None:
+    await mark_questions_used([(user_id, question_id, level)])
 
 
 async def get_leaderboard(limit: int = 10) -> List[Tuple[int, int]]:
@@ -85,6 +140,12 @@ async def get_leaderboard(limit: int = 10) -> List[Tuple[int, int]]:
         return [(row[0], row[1]) for row in result.all()]
 
 
+async def get_all_ratings() -> List[Tuple[int, int]]:
+    async with db_manager.session() as session:
+        result = await session.execute(select(Player.user_id, Player.rating))
+        return [(row[0], row[1]) for row in result.all()]
+
+
 async def increment_win_counter(user_id: int, level: str) -> None:
     if level not in ("easy", "medium", "hard"):
         raise ValueError(f"Неверный уровень сложности: {level}")
@@ -96,6 +157,7 @@ async def increment_win_counter(user_id: int, level: str) -> None:
         
         setattr(player, column_name, getattr(player, column_name) + 1)
         await session.commit()
+        profile_cache.put(user_id, _profile(player))
 
 
 async def increment_game_counter(user_id: int) -> None:
@@ -103,16 +165,65 @@ async def increment_game_counter(user_id: int) -> None:
         player = await _ensure_player_exists(session, user_id)
         player.total_games += 1
         await session.commit()
+        profile_cache.put(user_id, _profile(player))
 
 
-async def get_player_stats(user_id: int) -> Dict[str, int]:
+async def _settle(stmt) -> Dict[int, int]:
     async with db_manager.session() as session:
-        player = await _ensure_player_exists(session, user_id)
-        
-        return {
-            "rating": player.rating,
-            "wins_easy": player.wins_easy,
-            "wins_medium": player.wins_medium,
-            "wins_hard": player.wins_hard,
-            "total_games": player.total_games
-        }
\ No newline at end of file
+        result = await session.execute(stmt)
+        rows = result.all()
+        await session.commit()
+
+    ratings = {}
+    for row in rows:
+        profile = _profile(row)
+        profile_cache.put(row.user_id, profile)
+        ratings[row.user_id] = profile["rating"]
+    return ratings
+
+
+async def settle_match(winner_id: int, loser_id: int, level: str) -> Tuple[int, int]:
+    if level not in RATING_CHANGES:
+        raise ValueError(f"Неверный уровень сложности: {level}")
+
+    win_delta = RATING_CHANGES[level]["win"]
+    lose_delta = RATING_CHANGES[level]["lose"]
+    column_name = f"wins_{level}"
+    wins_column = getattr(Player, column_name)
+
+    stmt = _insert(Player).values([
+        {"user_id": winner_id, "rating": max(0, win_delta), column_name: 1, "total_games": 1},
+        {"user_id": loser_id, "rating": max(0, lose_delta), column_name: 0, "total_games": 1}
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Player.user_id],
+        set_={
+            "rating": _clamp_rating(
+                Player.rating + case((Player.user_id == winner_id, win_delta), else_=lose_delta)
+            ),
+            column_name: wins_column + getattr(stmt.excluded, column_name),
+            "total_games": Player.total_games + 1
+        }
+    ).returning(Player.user_id, *PROFILE_COLUMNS)
+
+    ratings = await _settle(stmt)
+    return ratings[winner_id], ratings[loser_id]
+
+
+async def settle_draw(user_id1: int, user_id2: int) -> Tuple[int, int]:
+    stmt = _insert(Player).values([
+        {"user_id": user_id1, "rating": 0, "total_games": 1},
+        {"user_id": user_id2, "rating": 0, "total_games": 1}
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Player.user_id],
+        set_={"total_games": Player.total_games + 1}
+    ).returning(Player.user_id, *PROFILE_COLUMNS)
+
+    ratings = await _settle(stmt)
+    return ratings[user_id1], ratings[user_id2]
+
+
+async def get_player_stats(user_id: int) -> Dict[str, int]:
+    profile = await _load_profile(user_id)
+    return dict(profile)
\ No newline at end of file
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+from sqlalchemy import insert
+from config import MATCH_RESULTS_BATCH_SIZE, MATCH_RESULTS_FLUSH_INTERVAL, MATCH_RESULTS_MAX_BUFFER
+from .connection import db_manager
+from .models import MatchResult
+
+logger = logging.getLogger(__name__)
+
+OUTCOME_SOLVED = "solved"
+OUTCOME_TIMEOUT = "timeout"
+
+
+class MatchResultWriter:
+    def __init__(self, batch_size: int = MATCH_RESULTS_BATCH_SIZE,
+                 flush_interval: float = MATCH_RESULTS_FLUSH_INTERVAL,
+                 max_buffer: int = MATCH_RESULTS_MAX_BUFFER):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def record(self, match_id: str, player1_id: int, player2_id: int, level: str,
+               question_id: Optional[int], winner_id: Optional[int], outcome: str,
+               solve_seconds: Optional[float] = None, started_at: Optional[datetime] = None) -> None:
+        if len(self._buffer) >= self.max_buffer:
+            self._buffer.popleft()
+            self.dropped += 1
+        self._buffer.append({
+            "match_id": match_id,
+            "player1_id": player1_id,
+            "player2_id": player2_id,
+            "level": level,
+            "question_id": question_id,
+            "winner_id": winner_id,
+            "outcome": outcome,
+            "solve_seconds": solve_seconds,
+            "started_at": started_at,
+            "finished_at": datetime.utcnow()
+        })
+
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        async with db_manager.session() as session:
+            await session.execute(insert(MatchResult), rows)
+            await session.commit()
+
+    async def flush(self) -> int:
+        flushed = 0
+        while self._buffer:
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            try:
+                await self._insert(batch)
+            except Exception as e:
+                self._buffer.extendleft(reversed(batch))
+                self.failed_flushes += 1
+                logger.warning("Failed to write %d match results, will retry: %s", len(batch), e)
+                break
+            flushed += len(batch)
+            self.written += len(batch)
+        return flushed
+
+    async def close(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+        self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes
+        }
+
+
+result_writer = MatchResultWriter()
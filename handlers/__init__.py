@@ -1,5 +1,6 @@
-from .common import router as common_router
+from .common import router as common_router, start_paired_match
 from .match import router as match_router
 from .rematch import router as rematch_router
+from .recovery import restore_live_state
 
-__all__ = ['common_router', 'match_router', 'rematch_router']
\ No newline at end of file
+__all__ = ['common_router', 'match_router', 'rematch_router', 'restore_live_state', 'start_paired_match']
\ No newline at end of file
@@ -8,26 +8,19 @@ from aiogram.types import (
     CallbackQuery
 )
 from aiogram.filters import Command
-from typing import Dict, List, Tuple
+from typing import Tuple
 from models import Player
-from database import get_player_rating, get_player_stats, get_leaderboard, fetch_seen_question_ids
+from database import get_player_rating, get_player_stats, fetch_seen_question_ids
+from services import leaderboard, matchmaker, outbound, state
 
 router = Router()
 
-queues: Dict[str, List[Player]] = {
-    "easy": [],
-    "medium": [],
-    "hard": []
-}
-
 LEVEL_NAMES = {
     "easy": "лёгкий",
     "medium": "средний",
     "hard": "сложный"
 }
 
-TOP_PLAYERS_LIMIT = 10
-
 def create_main_keyboard(include_leave_queue: bool = False) -> ReplyKeyboardMarkup:
     keyboard_buttons = [
         [KeyboardButton(text="👨‍✈️ Присоединиться к бою")],
@@ -79,54 +72,46 @@ def create_rematch_keyboard(key: str, accept: bool = False) -> InlineKeyboardMar
             InlineKeyboardButton(text="❌ Отказаться", callback_data=f"decline_rematch:{key}")
         ]])
 
-def is_player_in_queue(user_id: int) -> bool:
-    return any(any(p.user_id == user_id for p in queue) for queue in queues.values())
+def create_leaderboard_keyboard(page: int, pages: int) -> InlineKeyboardMarkup:
+    buttons = []
+    if page > 1:
+        buttons.append(InlineKeyboardButton(text="◀️", callback_data=f"leaderboard:{page - 1}"))
+    buttons.append(InlineKeyboardButton(text="📍 Моё место", callback_data="leaderboard:me"))
+    if page < pages:
+        buttons.append(InlineKeyboardButton(text="▶️", callback_data=f"leaderboard:{page + 1}"))
+    return InlineKeyboardMarkup(inline_keyboard=[buttons])
 
-def is_player_in_match(user_id: int) -> bool:
-    from .match import active_matches, player_matches
-    if user_id not in player_matches:
-        return False
-    match_id = player_matches.get(user_id)
-    match_exists = match_id in active_matches
-    if not match_exists:
-        del player_matches[user_id]
-        return False
-    return True
+async def is_player_in_queue(user_id: int) -> bool:
+    return await state.is_queued(user_id)
+
+async def is_player_in_match(user_id: int) -> bool:
+    return await state.get_player_match(user_id) is not None
 
-def get_player_status(user_id: int) -> Tuple[bool, bool]:
-    return is_player_in_queue(user_id), is_player_in_match(user_id)
+async def get_player_status(user_id: int) -> Tuple[bool, bool]:
+    return await is_player_in_queue(user_id), await is_player_in_match(user_id)
 
-def remove_player_from_queues(user_id: int) -> bool:
-    removed = False
-    for level in queues:
-        before_len = len(queues[level])
-        queues[level] = [p for p in queues[level] if p.user_id != user_id]
-        if len(queues[level]) < before_len:
-            removed = True
-    return removed
+async def remove_player_from_queues(user_id: int) -> bool:
+    return await state.cancel_queue(user_id)
 
 async def check_available_questions(user_id: int, level: str) -> Tuple[bool, str]:
     from models.match import MatchFactory
     seen_question_ids = await fetch_seen_question_ids(user_id, level)
-    all_questions = MatchFactory.get_questions_by_level(level)
-    available_questions = [q for q in all_questions if q.get('id') not in seen_question_ids]
-    if not available_questions:
+    if not MatchFactory.has_unseen_questions(level, seen_question_ids):
         return False, f"У тебя закончились вопросы уровня '{LEVEL_NAMES[level]}'. Попробуй другой уровень сложности."
     return True, ""
 
-async def try_start_match_with_opponent(current_player: Player, level: str) -> bool:
+async def start_paired_match(player: Player, opponent: Player, level: str):
     from .match import create_match
-    opponent = None
-    for player in queues[level]:
-        if player.user_id != current_player.user_id:
-            opponent = player
-            break
-    if opponent:
-        queues[level] = [p for p in queues[level] if p.user_id not in [current_player.user_id, opponent.user_id]]
-        await create_match(current_player, opponent, level)
-        print(f"Матч создан между игроками {current_player.user_id} и {opponent.user_id} на уровне {level}")
-        return True
-    return False
+    await create_match(player, opponent, level)
+    print(f"Матч создан между игроками {player.user_id} и {opponent.user_id} на уровне {level}")
+
+async def try_start_match_with_opponent(current_player: Player, level: str) -> bool:
+    pairing = await matchmaker.match_arrival(current_player, level)
+    if pairing is None:
+        return False
+    opponent, player, level = pairing
+    await start_paired_match(player, opponent, level)
+    return True
 
 @router.message(Command("start"))
 async def start_command(message: Message):
@@ -141,7 +126,7 @@ async def start_command(message: Message):
 @router.message(F.text == "👨‍✈️ Присоединиться к бою")
 async def join_battle(message: Message):
     user_id = message.from_user.id
-    in_queue, in_match = get_player_status(user_id)
+    in_queue, in_match = await get_player_status(user_id)
     if in_queue:
         await message.answer("Ты уже в очереди!")
         return
@@ -158,7 +143,7 @@ async def join_battle(message: Message):
 async def select_level(callback: CallbackQuery):
     level = callback.data.split("_")[1]
     user_id = callback.from_user.id
-    in_queue, in_match = get_player_status(user_id)
+    in_queue, in_match = await get_player_status(user_id)
     if in_queue:
         await callback.answer("Ты уже в очереди!")
         return
@@ -178,8 +163,10 @@ async def select_level(callback: CallbackQuery):
         rating=await get_player_rating(user_id),
         preferred_level=level
     )
-    queues[level].append(player)
-    print(f"Игрок {player.user_id} добавлен в очередь {level}. Текущая очередь {level}: {[p.user_id for p in queues[level]]}")
+    if not await state.enqueue(player, level):
+        await callback.answer("Ты уже в очереди!")
+        return
+    print(f"Игрок {player.user_id} добавлен в очередь {level}.")
     match_started = await try_start_match_with_opponent(player, level)
     if not match_started:
         keyboard = create_main_keyboard(include_leave_queue=True)
@@ -192,7 +179,7 @@ async def select_level(callback: CallbackQuery):
 @router.message(F.text == "❌ Выйти из очереди")
 async def leave_queue(message: Message):
     user_id = message.from_user.id
-    removed = remove_player_from_queues(user_id)
+    removed = await remove_player_from_queues(user_id)
     if removed:
         keyboard = create_main_keyboard()
         await message.answer("Ты вышел из очереди.", reply_markup=keyboard)
@@ -204,10 +191,12 @@ async def leave_queue(message: Message):
 async def show_profile(message: Message):
     user_id = message.from_user.id
     stats = await get_player_stats(user_id)
+    rank, total = await leaderboard.rank(user_id, stats['rating'])
     await message.answer(
         f"👤 Профиль игрока: {message.from_user.first_name}\n\n"
         f"🎮 Сыграно боев: {stats['total_games']}\n"
-        f"⭐ Рейтинг: {stats['rating']}\n\n"
+        f"⭐ Рейтинг: {stats['rating']}\n"
+        f"🏅 Место в рейтинге: {rank} из {total}\n\n"
         f"🏆 Статистика побед:\n\n"
         f"    🟢 Лёгкий уровень: {stats['wins_easy']}\n"
         f"    🟡 Средний уровень: {stats['wins_medium']}\n"
@@ -216,19 +205,33 @@ async def show_profile(message: Message):
 
 @router.message(F.text == "🏆 Турнирная таблица")
 async def show_leaderboard(message: Message):
-    leaderboard = await get_leaderboard(TOP_PLAYERS_LIMIT)
-    if not leaderboard:
-        await message.answer("Турнирная таблица пуста.")
-        return
-    text = f"🏆 Турнирная таблица (топ-{TOP_PLAYERS_LIMIT}):\n\n"
-    for i, (user_id, rating) in enumerate(leaderboard, 1):
+    text = await leaderboard.get_text(router.bot)
+    keyboard = create_leaderboard_keyboard(1, await leaderboard.page_count())
+    await message.answer(text, reply_markup=keyboard)
+
+@router.callback_query(F.data.startswith("leaderboard:"))
+async def show_leaderboard_page(callback: CallbackQuery):
+    target = callback.data.split(":", 1)[1]
+    pages = await leaderboard.page_count()
+    if target == "me":
+        user_id = callback.from_user.id
+        text = await leaderboard.get_around_text(router.bot, user_id, await get_player_rating(user_id))
+        rank, _ = await leaderboard.rank(user_id)
+        page = (rank - 1) // leaderboard.limit + 1 if rank else 1
+    else:
         try:
-            user = await router.bot.get_chat(user_id)
-            name = user.first_name
-        except Exception:
-            name = f"Игрок {user_id}"
-        text += f"{i}. {name} — {rating} очков\n"
-    await message.answer(text)
+            page = min(max(int(target), 1), pages)
+        except ValueError:
+            await callback.answer("Такой страницы нет.")
+            return
+        text = await leaderboard.get_page_text(router.bot, page)
+    outbound.edit_message_text(
+        text,
+        chat_id=callback.message.chat.id,
+        message_id=callback.message.message_id,
+        reply_markup=create_leaderboard_keyboard(page, pages)
+    )
+    await callback.answer()
 
 @router.message(F.text == "❓ Как играть")
 async def show_help(message: Message):
@@ -1,30 +1,51 @@
 from aiogram import Router
 from aiogram.types import Message
 import asyncio
-from typing import Dict
+from typing import Optional
 import time
 from models import Player, Match, MatchFactory, is_correct_answer
-from database import update_player_rating, increment_win_counter, increment_game_counter
-from config import RATING_CHANGES, TIMEOUT_SETTINGS
+from database import settle_match, settle_draw, result_writer, OUTCOME_SOLVED, OUTCOME_TIMEOUT
+from config import TIMEOUT_SETTINGS
+from services import leaderboard, timer_renderer, format_time, outbound, PRIORITY_RESULT, state, scheduler
 from .common import (
     create_game_keyboard, 
     create_no_questions_keyboard,
+    LEVEL_NAMES
 )
 
 router = Router()
 
-active_matches: Dict[str, Match] = {}
+def record_result(match: Match, winner_id: Optional[int], outcome: str):
+    result_writer.record(
+        match.match_id,
+        match.players[0].user_id,
+        match.players[1].user_id,
+        match.level,
+        match.question_id,
+        winner_id,
+        outcome,
+        solve_seconds=time.time() - match.start_time if outcome == OUTCOME_SOLVED else None,
+        started_at=match.started_at
+    )
 
-player_matches: Dict[int, str] = {}
 
+def arm_match_timeout(match: Match, delay: float):
+    scheduler.schedule(("match", match.match_id), delay, lambda: timeout_match(match.match_id))
+
+
+async def resume_match(match: Match) -> bool:
+    if not match.question:
+        await state.remove_match(match)
+        return False
+    remaining = max(0.0, match.start_time + match.timeout_duration - time.time())
+    arm_match_timeout(match, remaining)
+    if remaining > 0 and match.timer_messages:
+        timer_renderer.register(match)
+    return True
 
-async def start_match(player1: Player, player2: Player):
-    match = MatchFactory.create_match(player1, player2)
-    
-    active_matches[match.match_id] = match
- 
-    player_matches[player1.user_id] = match.match_id
-    player_matches[player2.user_id] = match.match_id
+
+async def start_match(player1: Player, player2: Player, intro: Optional[str] = None):
+    match = MatchFactory.create_match(player1, player2, await state.next_match_id())
 
     match.levels_chosen[player1.user_id] = player1.preferred_level
     match.levels_chosen[player2.user_id] = player2.preferred_level
@@ -33,19 +54,17 @@ async def start_match(player1: Player, player2: Player):
     final_level = levels[0]
     match.level = final_level
 
+    await state.save_match(match)
+
     question_available = await MatchFactory.select_question(match)
     
     if not question_available:
         keyboard = create_no_questions_keyboard()
         
-        for player in match.players:
-            if player.user_id in player_matches:
-                del player_matches[player.user_id]
-        
-        del active_matches[match.match_id]
+        await state.remove_match(match)
 
         for player in match.players:
-            await router.bot.send_message(
+            outbound.send_message(
                 player.user_id,
                 f"❗ Не удалось найти задачу на уровне \"{LEVEL_NAMES.get(match.level, match.level)}\", доступную для обоих игроков.\n"
                 f"Выберите другой уровень или присоединитесь к бою снова.",
@@ -54,23 +73,26 @@ async def start_match(player1: Player, player2: Player):
         
         return
     
-    timeout = TIMEOUT_SETTINGS[match.level]
+    if intro:
+        for player in match.players:
+            outbound.send_message(player.user_id, intro)
     
-    match.timeout_task = asyncio.create_task(timeout_match(match.match_id, timeout))
+    timeout = TIMEOUT_SETTINGS[match.level]
     
     match.start_time = time.time()
     
     match.timeout_duration = timeout
     
-    minutes = timeout // 60
-    seconds = timeout % 60
-    time_str = f"{minutes} мин. {seconds} сек." if minutes > 0 else f"{seconds} сек."
+    arm_match_timeout(match, timeout)
+    
+    time_str = format_time(timeout)
     
+    timer_requests = {}
     for player in match.players:
         keyboard = create_game_keyboard()
         opponent_name = match.players[0].display_name if player.user_id != match.players[0].user_id else match.players[1].display_name
 
-        await router.bot.send_message(
+        outbound.send_message(
             player.user_id,
             f"🔔 Найден соперник: {opponent_name}\n\n"
             f"Уровень сложности: \"{match.level}\"\n\n"
@@ -80,145 +102,107 @@ async def start_match(player1: Player, player2: Player):
             reply_markup=keyboard
         )
         
-        timer_msg = await router.bot.send_message(
+        timer_requests[player.user_id] = outbound.send_message(
             player.user_id,
             f"⏱ Время на ответ: {time_str}"
         )
-        
-        match.timer_messages[player.user_id] = timer_msg.message_id
     
-    match.timer_update_task = asyncio.create_task(update_timer(match.match_id))
+    timer_msgs = await asyncio.gather(*timer_requests.values(), return_exceptions=True)
+    for user_id, timer_msg in zip(timer_requests, timer_msgs):
+        if not isinstance(timer_msg, Exception):
+            match.timer_messages[user_id] = timer_msg.message_id
+    
+    await state.save_match(match)
+    
+    timer_renderer.register(match)
 
 
 @router.message()
 async def process_answer(message: Message):
     user_id = message.from_user.id
     
-    if user_id not in player_matches:
-        return
-    
-    match_id = player_matches[user_id]
-    
-    match = active_matches.get(match_id)
+    match = await state.get_player_match(user_id)
     
     if not match or match.answered or not match.question:
         return
     
+    match_id = match.match_id
+    
     user_answer = message.text
     
-    if is_correct_answer(user_answer, match.correct_answer):
+    if is_correct_answer(user_answer, match.answer_key or match.correct_answer):
+        if not await state.claim_match(match_id):
+            return
+        
         match.answered = True
 
-        if match.timeout_task and not match.timeout_task.done():
-            match.timeout_task.cancel()
+        scheduler.cancel(("match", match_id))
         
-        if match.timer_update_task and not match.timer_update_task.done():
-            match.timer_update_task.cancel()
+        timer_renderer.unregister(match_id)
 
         winner = next(p for p in match.players if p.user_id == user_id)
         loser = next(p for p in match.players if p.user_id != user_id)
         
-        level = match.level
-        
-        winner_rating = await update_player_rating(winner.user_id, RATING_CHANGES[level]["win"])
-        loser_rating = await update_player_rating(loser.user_id, RATING_CHANGES[level]["lose"])
+        winner_rating, loser_rating = await settle_match(winner.user_id, loser.user_id, match.level)
+        winner.rating, loser.rating = winner_rating, loser_rating
+        record_result(match, winner.user_id, OUTCOME_SOLVED)
+        leaderboard.on_rating_change(winner.user_id, winner_rating, winner.first_name)
+        leaderboard.on_rating_change(loser.user_id, loser_rating, loser.first_name)
         
-        await increment_game_counter(winner.user_id)
-        await increment_game_counter(loser.user_id)
-        
-        await increment_win_counter(winner.user_id, level)
-        
-        await router.bot.send_message(
+        outbound.send_message(
             winner.user_id,
-            f"🎉 Ты выиграл! Новый рейтинг: {winner_rating}"
+            f"🎉 Ты выиграл! Новый рейтинг: {winner_rating}",
+            priority=PRIORITY_RESULT
         )
         
-        await router.bot.send_message(
+        outbound.send_message(
             loser.user_id,
             f"Увы, проиграл. Правильный ответ: {match.correct_answer}\n"
-            f"Новый рейтинг: {loser_rating}"
+            f"Новый рейтинг: {loser_rating}",
+            priority=PRIORITY_RESULT
         )
         
         from .rematch import offer_rematch
 
+        await state.remove_match(match)
+
         await offer_rematch(match.players[0], match.players[1])
+    else:
+        outbound.send_message(message.chat.id, "Неверно. Попробуйте ещё раз!")
+
+
+async def timeout_match(match_id: str):
+    timer_renderer.unregister(match_id)
+
+    match = await state.get_match(match_id)
+    
+    if match is None:
+        return
+    
+    if await state.claim_match(match_id):
+        match.answered = True
         
+        match.players[0].rating, match.players[1].rating = await settle_draw(
+            match.players[0].user_id, match.players[1].user_id
+        )
         for player in match.players:
-            if player.user_id in player_matches:
-                del player_matches[player.user_id]
+            leaderboard.on_rating_change(player.user_id, player.rating, player.first_name)
+        record_result(match, None, OUTCOME_TIMEOUT)
         
-        del active_matches[match_id]
-    else:
-        await message.answer("Неверно. Попробуйте ещё раз!")
-
-
-async def update_timer(match_id: str):
-    try:
-        while True:
-            if match_id not in active_matches:
-                return
-                
-            match = active_matches[match_id]
-            
-            if match.answered:
-                return
-            
-            elapsed = time.time() - match.start_time
-            
-            remaining = max(0, match.timeout_duration - elapsed)
-            
-            minutes = int(remaining) // 60
-            seconds = int(remaining) % 60
-            time_str = f"{minutes} мин. {seconds} сек." if minutes > 0 else f"{seconds} сек."
-            
-            for player in match.players:
-                if player.user_id in match.timer_messages:
-                    try:
-                        await router.bot.edit_message_text(
-                            f"⏱ Осталось времени: {time_str}",
-                            chat_id=player.user_id,
-                            message_id=match.timer_messages[player.user_id]
-                        )
-                    except Exception:
-                        pass
-            
-            await asyncio.sleep(1)
-    except asyncio.CancelledError:
-        pass
-
-
-async def timeout_match(match_id: str, timeout: int):
-    try:
-        await asyncio.sleep(timeout)
-
-        if match_id not in active_matches:
-            return
-            
-        match = active_matches[match_id]
+        for player in match.players:
+            outbound.send_message(
+                player.user_id,
+                f"⏰ Время вышло! Никто не успел ответить. Поединок — ничья.\n"
+                f"Правильный ответ: {match.correct_answer}\n"
+                f"Рейтинг не изменился, но бой засчитан в сыгранные.",
+                priority=PRIORITY_RESULT
+            )
         
-        if match.timer_update_task and not match.timer_update_task.done():
-            match.timer_update_task.cancel()
+        from .rematch import offer_rematch
         
-        if not match.answered:
-            for player in match.players:
-                await router.bot.send_message(
-                    player.user_id,
-                    f"⏰ Время вышло! Никто не успел ответить. Поединок — ничья.\n"
-                    f"Правильный ответ: {match.correct_answer}\n"
-                    f"Рейтинг не изменился."
-                )
-            
-            from .rematch import offer_rematch
-            
-            await offer_rematch(match.players[0], match.players[1])
-            
-            for player in match.players:
-                if player.user_id in player_matches:
-                    del player_matches[player.user_id]
-            
-            del active_matches[match_id]
-    except asyncio.CancelledError:
-        pass
+        await state.remove_match(match)
+        
+        await offer_rematch(match.players[0], match.players[1])
 
 async def create_match(player1: Player, player2: Player, level: str):
     
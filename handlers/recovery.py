@@ -0,0 +1,30 @@
+import time
+from typing import Dict, Tuple
+
+from services import state, snapshotter, StateSnapshotter
+from .match import resume_match
+from .rematch import arm_rematch_timeout, REMATCH_TIMEOUT
+
+
+async def restore_live_state(source: StateSnapshotter = snapshotter) -> Dict[str, int]:
+    snapshot = source.load()
+    rematch_deadlines: Dict[Tuple[int, int], float] = {}
+    if snapshot is not None:
+        if snapshot["state"] is not None:
+            await state.import_state(snapshot["state"])
+        for (kind, ident), when in snapshot["deadlines"]:
+            if kind == "rematch":
+                rematch_deadlines[tuple(ident)] = when
+
+    resumed = 0
+    for match in await state.list_matches():
+        if await resume_match(match):
+            resumed += 1
+
+    now = time.time()
+    rematches = await state.list_rematches()
+    for pair_key in rematches:
+        arm_rematch_timeout(pair_key, max(0.0, rematch_deadlines.get(pair_key, now + REMATCH_TIMEOUT) - now))
+
+    depths = await state.queue_depths()
+    return {"matches": resumed, "rematches": len(rematches), "queued": sum(depths.values())}
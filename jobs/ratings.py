@@ -0,0 +1,211 @@
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select, update
+
+from config import ELO_INITIAL_RATING, ELO_K_FACTOR, RATING_JOB_CHUNK_SIZE
+from database import db_manager, init_db
+from database.models import MatchResult, Player
+
+Outcomes = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class PlayerIndex:
+    def __init__(self, initial: float = ELO_INITIAL_RATING):
+        self.initial = initial
+        self.user_ids: List[int] = []
+        self.ratings = np.empty(0, dtype=np.float64)
+        self._positions: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def seed(self, entries: Iterable[Tuple[int, Optional[int]]], carry: float = 0.0) -> None:
+        entries = list(entries)
+        user_ids = np.fromiter((user_id for user_id, _ in entries), dtype=np.int64, count=len(entries))
+        current = np.fromiter(
+            (self.initial if rating is None else rating for _, rating in entries), dtype=np.float64, count=len(entries)
+        )
+        positions = self.positions(user_ids)
+        self.ratings[positions] = self.initial + carry * (current - self.initial)
+
+    def positions(self, user_ids: np.ndarray) -> np.ndarray:
+        unique, inverse = np.unique(user_ids, return_inverse=True)
+        mapped = np.empty(len(unique), dtype=np.int64)
+        added = 0
+        for i, user_id in enumerate(unique.tolist()):
+            position = self._positions.get(user_id)
+            if position is None:
+                position = len(self.user_ids)
+                self._positions[user_id] = position
+                self.user_ids.append(user_id)
+                added += 1
+            mapped[i] = position
+        if added:
+            self.ratings = np.concatenate([self.ratings, np.full(added, self.initial, dtype=np.float64)])
+        return mapped[inverse]
+
+
+def outcome_scores(first: np.ndarray, second: np.ndarray, winner: np.ndarray) -> np.ndarray:
+    return np.where(winner == first, 1.0, np.where(winner == second, 0.0, 0.5))
+
+
+def assign_rounds(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    last: Dict[int, int] = {}
+    rounds = []
+    for a, b in zip(first.tolist(), second.tolist()):
+        current = max(last.get(a, -1), last.get(b, -1)) + 1
+        last[a] = last[b] = current
+        rounds.append(current)
+    return np.array(rounds, dtype=np.int64)
+
+
+def replay_elo(ratings: np.ndarray, first: np.ndarray, second: np.ndarray, scores: np.ndarray,
+               k: float = ELO_K_FACTOR, rounds: Optional[np.ndarray] = None) -> int:
+    if not len(first):
+        return 0
+    if rounds is None:
+        rounds = assign_rounds(first, second)
+    order = np.argsort(rounds, kind="stable")
+    first, second, scores = first[order], second[order], scores[order]
+    bounds = np.flatnonzero(np.diff(rounds[order])) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(order)]))
+
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        a = first[start:end]
+        b = second[start:end]
+        expected = 1.0 / (1.0 + 10.0 ** ((ratings[b] - ratings[a]) / 400.0))
+        delta = k * (scores[start:end] - expected)
+        ratings[a] += delta
+        ratings[b] -= delta
+    return len(starts)
+
+
+async def read_elo_ratings() -> List[Tuple[int, Optional[int]]]:
+    async with db_manager.session() as session:
+        result = await session.execute(select(Player.user_id, Player.elo_rating))
+        return [(user_id, elo_rating) for user_id, elo_rating in result.all()]
+
+
+async def stream_outcomes(since: Optional[datetime] = None,
+                          chunk_size: int = RATING_JOB_CHUNK_SIZE) -> AsyncIterator[Outcomes]:
+    stmt = select(MatchResult.player1_id, MatchResult.player2_id, MatchResult.winner_id).order_by(
+        MatchResult.finished_at, MatchResult.id
+    )
+    if since is not None:
+        stmt = stmt.where(MatchResult.finished_at >= since)
+
+    async with db_manager.session() as session:
+        result = await session.stream(stmt.execution_options(yield_per=chunk_size))
+        async for rows in result.partitions(chunk_size):
+            count = len(rows)
+            first = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+            second = np.fromiter((row[1] for row in rows), dtype=np.int64, count=count)
+            winner = np.fromiter((-1 if row[2] is None else row[2] for row in rows), dtype=np.int64, count=count)
+            yield first, second, winner
+
+
+async def write_ratings(user_ids: List[int], ratings: np.ndarray, chunk_size: int = RATING_JOB_CHUNK_SIZE) -> int:
+    values = np.maximum(np.rint(ratings), 0).astype(np.int64).tolist()
+    written = 0
+    for start in range(0, len(user_ids), chunk_size):
+        rows = [
+            {"user_id": user_id, "elo_rating": rating}
+            for user_id, rating in zip(user_ids[start:start + chunk_size], values[start:start + chunk_size])
+        ]
+        async with db_manager.session() as session:
+            await session.execute(update(Player), rows)
+            await session.commit()
+        written += len(rows)
+    return written
+
+
+async def recompute(since: Optional[datetime] = None, carry: float = 0.0, k: float = ELO_K_FACTOR,
+                    initial: float = ELO_INITIAL_RATING, chunk_size: int = RATING_JOB_CHUNK_SIZE,
+                    dry_run: bool = False) -> Dict:
+    started = time.perf_counter()
+    players = PlayerIndex(initial)
+    players.seed(await read_elo_ratings(), carry)
+
+    matches = 0
+    rounds = 0
+    schedule_seconds = 0.0
+    replay_seconds = 0.0
+    async for first, second, winner in stream_outcomes(since, chunk_size):
+        mark = time.perf_counter()
+        scores = outcome_scores(first, second, winner)
+        first, second = players.positions(first), players.positions(second)
+        schedule = assign_rounds(first, second)
+        schedule_seconds += time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        rounds += replay_elo(players.ratings, first, second, scores, k, schedule)
+        replay_seconds += time.perf_counter() - mark
+        matches += len(first)
+    read_seconds = time.perf_counter() - started - schedule_seconds - replay_seconds
+
+    mark = time.perf_counter()
+    written = 0 if dry_run else await write_ratings(players.user_ids, players.ratings, chunk_size)
+    write_seconds = time.perf_counter() - mark
+    total_seconds = time.perf_counter() - started
+
+    return {
+        "matches": matches,
+        "players": len(players),
+        "rounds": rounds,
+        "written": written,
+        "read_seconds": read_seconds,
+        "schedule_seconds": schedule_seconds,
+        "replay_seconds": replay_seconds,
+        "write_seconds": write_seconds,
+        "total_seconds": total_seconds,
+        "replay_matches_per_sec": matches / replay_seconds if replay_seconds else None,
+        "matches_per_sec": matches / total_seconds if total_seconds else None
+    }
+
+
+async def run(args) -> Dict:
+    await init_db(args.database_url)
+    try:
+        return await recompute(
+            since=args.since,
+            carry=args.carry,
+            k=args.k,
+            initial=args.initial,
+            chunk_size=args.chunk_size,
+            dry_run=args.dry_run
+        )
+    finally:
+        await db_manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recompute Elo ratings from match history and write them to players.elo_rating"
+    )
+    parser.add_argument("--database-url", help="defaults to the bot's database settings")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="only replay matches finished at or after this UTC time")
+    parser.add_argument("--carry", type=float, default=0.0,
+                        help="share of the current Elo rating kept at the start of the replay (0 resets everyone)")
+    parser.add_argument("--k", type=float, default=ELO_K_FACTOR)
+    parser.add_argument("--initial", type=float, default=ELO_INITIAL_RATING)
+    parser.add_argument("--chunk-size", type=int, default=RATING_JOB_CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="compute ratings without writing them")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+    report = asyncio.run(run(args))
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
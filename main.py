@@ -1,23 +1,57 @@
 import logging
 import asyncio
+import signal
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
-from config import BOT_TOKEN
-from database import db_manager, init_db
-from handlers import common_router, match_router, rematch_router
+from config import (
+    BOT_TOKEN,
+    BOT_MODE,
+    WEBHOOK_BASE_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBAPP_HOST,
+    WEBAPP_PORT,
+    METRICS_ENABLED
+)
+from database import db_manager, init_db, result_writer
+from handlers import common_router, match_router, rematch_router, restore_live_state, start_paired_match
 from models import MatchFactory
+from services import (
+    leaderboard,
+    matchmaker,
+    scheduler,
+    snapshotter,
+    timer_renderer,
+    outbound,
+    state,
+    instrument_routers,
+    instrument_bot,
+    instrument_engine,
+    start_metrics_server
+)
 
 
-async def main():
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
-    )
-    
-    bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-    
+async def shutdown(metrics_runner=None):
+    matchmaker.stop()
+    snapshotter.stop()
+    try:
+        size = await snapshotter.save()
+        logging.info("Saved live state snapshot to %s (%s bytes)", snapshotter.path, size)
+    except (OSError, TypeError, ValueError) as e:
+        logging.error("Failed to save live state snapshot: %s", e)
+    scheduler.stop()
+    timer_renderer.stop()
+    MatchFactory.stop_watching_questions()
+    await outbound.close()
+    await state.close()
+    await result_writer.close()
+    await db_manager.close()
+    if metrics_runner is not None:
+        await metrics_runner.cleanup()
+
+
+def create_dispatcher(bot: Bot) -> Dispatcher:
     dp = Dispatcher()
     
     dp.include_router(common_router)
@@ -27,23 +61,108 @@ async def main():
     common_router.bot = bot
     match_router.bot = bot
     rematch_router.bot = bot
+    outbound.bot = bot
+
+    instrument_routers(common_router, match_router, rematch_router)
+    instrument_bot(bot)
+    return dp
+
+
+async def start_services() -> bool:
+    await asyncio.gather(init_db(), asyncio.to_thread(MatchFactory.load_questions))
+    logging.info("Database pool ready: %s", db_manager.pool_stats())
+    instrument_engine(db_manager.engine)
+    
+    logging.info("Rank index loaded: %s players", await leaderboard.load())
+    MatchFactory.watch_questions()
+    
+    restored = await restore_live_state()
+    logging.info("Restored live state: %s", restored)
+    snapshotter.start()
+    matchmaker.start(start_paired_match)
+    return not any(restored.values())
+
+
+async def run_polling(dp: Dispatcher, bot: Bot, drop_pending_updates: bool = True):
+    await bot.delete_webhook(drop_pending_updates=drop_pending_updates)
+
+    await dp.start_polling(bot)
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, drop_pending_updates: bool = True):
+    from aiohttp import web
+    from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+    async def on_startup(bot: Bot):
+        await bot.set_webhook(
+            f"{WEBHOOK_BASE_URL}{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            drop_pending_updates=drop_pending_updates
+        )
+
+    dp.startup.register(on_startup)
+
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=WEBHOOK_SECRET,
+        handle_in_background=True
+    ).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=WEBAPP_HOST, port=WEBAPP_PORT)
+    await site.start()
+    logging.info("Webhook server listening on %s:%s%s", WEBAPP_HOST, WEBAPP_PORT, WEBHOOK_PATH)
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass
+
+    try:
+        await stop_event.wait()
+        logging.info("Stopping webhook server")
+    finally:
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.remove_signal_handler(sig)
+            except NotImplementedError:
+                pass
+        await runner.cleanup()
+        await bot.session.close()
+
+
+async def main():
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+    )
+    
+    bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    
+    dp = create_dispatcher(bot)
     
-    await init_db()
+    drop_pending_updates = await start_services()
     
-    MatchFactory.load_questions()
+    metrics_runner = await start_metrics_server() if METRICS_ENABLED else None
     
     try:
-        await bot.delete_webhook(drop_pending_updates=True)
-
-        await dp.start_polling(bot)
-    except KeyboardInterrupt:
-        from handlers.match import active_matches
-        for match in active_matches.values():
-            if match.timeout_task and not match.timeout_task.done():
-                match.timeout_task.cancel()
+        if BOT_MODE == "webhook":
+            await run_webhook(dp, bot, drop_pending_updates)
+        else:
+            await run_polling(dp, bot, drop_pending_updates)
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
     finally:
-        await db_manager.close()
+        await shutdown(metrics_runner)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
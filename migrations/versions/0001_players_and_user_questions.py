@@ -0,0 +1,36 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "players",
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("rating", sa.Integer(), nullable=False),
+        sa.Column("wins_easy", sa.Integer(), nullable=False),
+        sa.Column("wins_medium", sa.Integer(), nullable=False),
+        sa.Column("wins_hard", sa.Integer(), nullable=False),
+        sa.Column("total_games", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id")
+    )
+    op.create_table(
+        "user_questions",
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("question_id", sa.Integer(), nullable=False),
+        sa.Column("level", sa.String(), nullable=False),
+        sa.Column("used_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["players.user_id"]),
+        sa.PrimaryKeyConstraint("user_id", "question_id")
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_questions")
+    op.drop_table("players")
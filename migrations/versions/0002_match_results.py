@@ -0,0 +1,35 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "match_results",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("match_id", sa.String(), nullable=False),
+        sa.Column("player1_id", sa.BigInteger(), nullable=False),
+        sa.Column("player2_id", sa.BigInteger(), nullable=False),
+        sa.Column("level", sa.String(), nullable=False),
+        sa.Column("question_id", sa.Integer(), nullable=True),
+        sa.Column("winner_id", sa.BigInteger(), nullable=True),
+        sa.Column("outcome", sa.String(), nullable=False),
+        sa.Column("solve_seconds", sa.Float(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_match_results_question_id", "match_results", ["question_id"])
+    op.create_index("ix_match_results_level_finished_at", "match_results", ["level", "finished_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_match_results_level_finished_at", table_name="match_results")
+    op.drop_index("ix_match_results_question_id", table_name="match_results")
+    op.drop_table("match_results")
@@ -0,0 +1,17 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("players", sa.Column("elo_rating", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("players", "elo_rating")
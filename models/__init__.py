@@ -1,4 +1,8 @@
 from .player import Player
+from .answer_parser import AnswerParseError, parse_answer
+from .answers import AnswerKey, compile_answer
+from .question_bank import QuestionBank
+from .question_store import IndexedQuestionBank, QuestionStore
 from .match import Match, MatchFactory, is_correct_answer
 
-__all__ = ['Player', 'Match', 'MatchFactory', 'is_correct_answer']
\ No newline at end of file
+__all__ = ['Player', 'AnswerParseError', 'parse_answer', 'AnswerKey', 'compile_answer', 'QuestionBank', 'IndexedQuestionBank', 'QuestionStore', 'Match', 'MatchFactory', 'is_correct_answer']
\ No newline at end of file
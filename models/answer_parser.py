@@ -0,0 +1,225 @@
+import math
+import re
+from fractions import Fraction
+from typing import List, Optional, Tuple
+
+MAX_ANSWER_LENGTH = 64
+MAX_NUMBER_DIGITS = 18
+MAX_EXPONENT = 9
+MAX_POWER = 32
+MAX_COMBINATORIAL_N = 1000
+MAX_FACTORIAL_N = 100
+MAX_NESTING_DEPTH = 8
+MAX_RESULT_BITS = 256
+
+_FRACTION_RE = re.compile(r"(-?)(\d{1,18})\s*/\s*(\d{1,18})")
+_DECIMAL_RE = re.compile(r"(-?\d{1,18}(?:[.,]\d{1,18})?)(%?)")
+
+_TOKEN_RE = re.compile(r"\d+|[^\W\d_]+|\S")
+
+_MULTIPLY = {"*", "×", "·"}
+_DIVIDE = {"/", ":", "÷"}
+_COMBINATIONS = {"c", "с"}
+_ARRANGEMENTS = {"a", "а"}
+_EXPONENT_MARKERS = {"e", "е"}
+
+
+class AnswerParseError(ValueError):
+    pass
+
+
+def _bounded(value: Fraction) -> Fraction:
+    if value.numerator.bit_length() > MAX_RESULT_BITS or value.denominator.bit_length() > MAX_RESULT_BITS:
+        raise AnswerParseError("value is too large")
+    return value
+
+
+def _number(integer: str, fraction: str = "", exponent: int = 0) -> Fraction:
+    if len(integer) + len(fraction) > MAX_NUMBER_DIGITS:
+        raise AnswerParseError("number has too many digits")
+    if abs(exponent) > MAX_EXPONENT:
+        raise AnswerParseError("exponent is out of range")
+    value = Fraction(int(integer + fraction), 10 ** len(fraction))
+    return value * Fraction(10) ** exponent
+
+
+class _Parser:
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.position = 0
+        self.depth = 0
+        self.in_arguments = 0
+
+    def peek(self, offset: int = 0) -> Optional[str]:
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def take(self) -> str:
+        token = self.peek()
+        if token is None:
+            raise AnswerParseError("unexpected end of input")
+        self.position += 1
+        return token
+
+    def expect(self, token: str) -> None:
+        if self.take() != token:
+            raise AnswerParseError(f"expected {token!r}")
+
+    def parse(self) -> Fraction:
+        value = self.expression()
+        if self.peek() is not None:
+            raise AnswerParseError(f"unexpected token {self.peek()!r}")
+        return value
+
+    def expression(self) -> Fraction:
+        self.depth += 1
+        if self.depth > MAX_NESTING_DEPTH:
+            raise AnswerParseError("expression is nested too deeply")
+        value = self.term()
+        while self.peek() in ("+", "-"):
+            if self.take() == "+":
+                value = _bounded(value + self.term())
+            else:
+                value = _bounded(value - self.term())
+        self.depth -= 1
+        return value
+
+    def term(self) -> Fraction:
+        value = self.unary()
+        while self.peek() in _MULTIPLY or self.peek() in _DIVIDE:
+            operator = self.take()
+            operand = self.unary()
+            if operator in _MULTIPLY:
+                value = _bounded(value * operand)
+            elif operand == 0:
+                raise AnswerParseError("division by zero")
+            else:
+                value = _bounded(value / operand)
+        return value
+
+    def unary(self) -> Fraction:
+        sign = 1
+        while self.peek() in ("+", "-"):
+            if self.take() != "+":
+                sign = -sign
+        return sign * self.power()
+
+    def power(self) -> Fraction:
+        base = self.postfix()
+        if self.peek() != "^":
+            return base
+        self.take()
+        exponent = self.unary()
+        if exponent.denominator != 1 or abs(exponent.numerator) > MAX_POWER:
+            raise AnswerParseError("unsupported exponent")
+        if base == 0 and exponent < 0:
+            raise AnswerParseError("division by zero")
+        bits = max(base.numerator.bit_length(), base.denominator.bit_length())
+        if bits * abs(exponent.numerator) > MAX_RESULT_BITS:
+            raise AnswerParseError("value is too large")
+        return base ** exponent.numerator
+
+    def postfix(self) -> Fraction:
+        value = self.primary()
+        while self.peek() in ("%", "!"):
+            if self.take() == "%":
+                value = value / 100
+            else:
+                if value.denominator != 1 or not 0 <= value.numerator <= MAX_FACTORIAL_N:
+                    raise AnswerParseError("unsupported factorial")
+                value = _bounded(Fraction(math.factorial(value.numerator)))
+        return value
+
+    def primary(self) -> Fraction:
+        token = self.peek()
+        if token is None:
+            raise AnswerParseError("unexpected end of input")
+        if token == "(":
+            self.take()
+            value = self.expression()
+            self.expect(")")
+            return value
+        if token.isdigit() or token in (".", ","):
+            return self.number()
+        if token in _COMBINATIONS or token in _ARRANGEMENTS:
+            return self.combinatorial()
+        raise AnswerParseError(f"unexpected token {token!r}")
+
+    def number(self) -> Fraction:
+        integer = self.take() if self.peek().isdigit() else "0"
+        fraction = ""
+        separator = self.peek()
+        next_token = self.peek(1)
+        if (separator == "." or (separator == "," and not self.in_arguments)) and next_token and next_token.isdigit():
+            self.take()
+            fraction = self.take()
+        elif integer == "0" and separator in (".", ","):
+            raise AnswerParseError("malformed number")
+
+        exponent = 0
+        if self.peek() in _EXPONENT_MARKERS:
+            offset = 1
+            sign = 1
+            if self.peek(1) in ("+", "-"):
+                sign = -1 if self.peek(1) == "-" else 1
+                offset = 2
+            digits = self.peek(offset)
+            if digits is None or not digits.isdigit():
+                raise AnswerParseError("malformed exponent")
+            self.position += offset + 1
+            if len(digits) > 2:
+                raise AnswerParseError("exponent is out of range")
+            exponent = sign * int(digits)
+        return _number(integer, fraction, exponent)
+
+    def combinatorial(self) -> Fraction:
+        name = self.take()
+        self.expect("(")
+        self.in_arguments += 1
+        n = self.expression()
+        self.expect(",")
+        k = self.expression()
+        self.in_arguments -= 1
+        self.expect(")")
+        if n.denominator != 1 or k.denominator != 1 or not 0 <= k.numerator <= n.numerator <= MAX_COMBINATORIAL_N:
+            raise AnswerParseError("unsupported combinatorial arguments")
+        if name in _COMBINATIONS:
+            return _bounded(Fraction(math.comb(n.numerator, k.numerator)))
+        return _bounded(Fraction(math.perm(n.numerator, k.numerator)))
+
+
+def _fast_path(text: str) -> Optional[Fraction]:
+    match = _FRACTION_RE.fullmatch(text)
+    if match:
+        sign, numerator, denominator = match.groups()
+        if int(denominator) == 0:
+            raise AnswerParseError("division by zero")
+        value = Fraction(int(numerator), int(denominator))
+        return -value if sign else value
+
+    match = _DECIMAL_RE.fullmatch(text)
+    if match:
+        number, percent = match.groups()
+        value = Fraction(number.replace(",", "."))
+        return value / 100 if percent else value
+    return None
+
+
+def tokenize(text: str) -> Tuple[str, ...]:
+    return tuple(_TOKEN_RE.findall(text))
+
+
+def parse_answer(text: Optional[str]) -> Optional[Fraction]:
+    if text is None:
+        return None
+    text = text.strip().lower().replace("−", "-")
+    if not text or len(text) > MAX_ANSWER_LENGTH:
+        return None
+
+    try:
+        value = _fast_path(text)
+        if value is not None:
+            return value
+        return _Parser(list(tokenize(text))).parse()
+    except (AnswerParseError, ValueError, ZeroDivisionError):
+        return None
@@ -0,0 +1,44 @@
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import FrozenSet, Iterable, Optional
+
+from .answer_parser import parse_answer
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    text: str
+    texts: FrozenSet[str]
+    rationals: FrozenSet[Fraction]
+
+    def matches(self, user_answer: Optional[str]) -> bool:
+        if user_answer is None:
+            return False
+
+        user_answer = user_answer.strip().lower()
+        if user_answer in self.texts:
+            return True
+
+        if not self.rationals:
+            return False
+
+        return parse_answer(user_answer) in self.rationals
+
+
+def compile_answer(answer: str, alternates: Iterable[str] = ()) -> AnswerKey:
+    texts = set()
+    rationals = set()
+
+    for form in (answer, *alternates):
+        form = str(form).strip().lower()
+        texts.add(form)
+
+        rational = parse_answer(form)
+        if rational is not None:
+            rationals.add(rational)
+
+    return AnswerKey(
+        text=answer,
+        texts=frozenset(texts),
+        rationals=frozenset(rationals)
+    )
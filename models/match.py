@@ -1,14 +1,14 @@
-from dataclasses import dataclass, field
-from typing import Dict, Optional, Tuple, List
 import asyncio
-import random
-import json
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Optional, Tuple, List, Set, Union
 from datetime import datetime
-from fractions import Fraction
 import time
 
 from .player import Player
-from database import fetch_seen_question_ids, mark_question_used
+from .question_bank import QuestionBank
+from .question_store import QuestionStore, EMPTY_BANK
+from .answers import AnswerKey, compile_answer
+from database import fetch_seen_question_ids, mark_questions_used
 
 @dataclass
 class Match:
@@ -19,39 +19,108 @@ class Match:
     question_id: Optional[int] = None
     question: Optional[str] = None
     correct_answer: Optional[str] = None
+    answer_key: Optional[AnswerKey] = None
     started_at: Optional[datetime] = None
     answered: bool = False
-    timeout_task: Optional[asyncio.Task] = None
     start_time: float = field(default_factory=time.time)
     timeout_duration: int = 300
     question_messages: Dict[int, int] = field(default_factory=dict)
-    timer_update_task: Optional[asyncio.Task] = None
     timer_messages: Dict[int, int] = field(default_factory=dict)
 
+    def to_dict(self) -> Dict:
+        return {
+            "match_id": self.match_id,
+            "players": [asdict(player) for player in self.players],
+            "levels_chosen": {str(user_id): level for user_id, level in self.levels_chosen.items()},
+            "level": self.level,
+            "question_id": self.question_id,
+            "question": self.question,
+            "correct_answer": self.correct_answer,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "answered": self.answered,
+            "start_time": self.start_time,
+            "timeout_duration": self.timeout_duration,
+            "question_messages": {str(user_id): msg_id for user_id, msg_id in self.question_messages.items()},
+            "timer_messages": {str(user_id): msg_id for user_id, msg_id in self.timer_messages.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Match':
+        return cls(
+            match_id=data["match_id"],
+            players=tuple(Player(**player) for player in data["players"]),
+            levels_chosen={int(user_id): level for user_id, level in data["levels_chosen"].items()},
+            level=data["level"],
+            question_id=data["question_id"],
+            question=data["question"],
+            correct_answer=data["correct_answer"],
+            answer_key=MatchFactory.get_answer_key(data["question_id"], data["correct_answer"]),
+            started_at=datetime.fromisoformat(data["started_at"]) if data["started_at"] else None,
+            answered=data["answered"],
+            start_time=data["start_time"],
+            timeout_duration=data["timeout_duration"],
+            question_messages={int(user_id): msg_id for user_id, msg_id in data["question_messages"].items()},
+            timer_messages={int(user_id): msg_id for user_id, msg_id in data["timer_messages"].items()}
+        )
+
 
 class MatchFactory:
     _match_counter: int = 0
-    _questions: Dict[str, List[Dict]] = {}
+    _questions: QuestionBank = QuestionBank()
+    _retired: Optional[QuestionBank] = None
+    _store: QuestionStore = QuestionStore()
     
     @classmethod
     def load_questions(cls):
         try:
-            with open('questions.json', 'r', encoding='utf-8') as f:
-                cls._questions = json.load(f)
+            cls._swap_questions(cls._store.load())
         except FileNotFoundError:
-            print("Error: questions.json file not found")
-            cls._questions = {"easy": [], "medium": [], "hard": []}
+            print(f"Error: {cls._store.source} file not found")
+            cls._swap_questions(QuestionBank.from_dict(EMPTY_BANK))
     
     @classmethod
-    def get_questions_by_level(cls, level: str) -> List[Dict]:
+    def _swap_questions(cls, bank: QuestionBank):
+        previous, cls._questions = cls._questions, bank
+        if previous is bank:
+            return
+        if cls._retired is not None:
+            cls._retired.close()
+        cls._retired = previous
+    
+    @classmethod
+    def watch_questions(cls):
+        cls._store.start(cls._swap_questions)
+    
+    @classmethod
+    def stop_watching_questions(cls):
+        cls._store.stop()
+    
+    @classmethod
+    def get_question_bank(cls) -> QuestionBank:
         if not cls._questions:
             cls.load_questions()
-        return cls._questions.get(level, [])
+        return cls._questions
+    
+    @classmethod
+    def get_questions_by_level(cls, level: str) -> List[Dict]:
+        return cls.get_question_bank().questions_by_level(level)
+    
+    @classmethod
+    def get_answer_key(cls, question_id: Optional[int], answer: Optional[str]) -> Optional[AnswerKey]:
+        key = cls.get_question_bank().answer_key(question_id) if question_id is not None else None
+        if answer is not None and (key is None or key.text != answer):
+            key = compile_answer(answer)
+        return key
     
     @classmethod
-    def create_match(cls, player1: Player, player2: Player) -> Match:
-        cls._match_counter += 1
-        match_id = f"match_{cls._match_counter}"
+    def has_unseen_questions(cls, level: str, seen: Set[int]) -> bool:
+        return cls.get_question_bank().has_unseen(level, seen)
+    
+    @classmethod
+    def create_match(cls, player1: Player, player2: Player, match_id: Optional[str] = None) -> Match:
+        if match_id is None:
+            cls._match_counter += 1
+            match_id = f"match_{cls._match_counter}"
         
         return Match(
             match_id=match_id,
@@ -61,56 +130,37 @@ class MatchFactory:
     
     @classmethod
     async def select_question(cls, match: Match) -> bool:
-        if not cls._questions:
-            cls.load_questions()
-            
-        if match.level not in cls._questions or not cls._questions[match.level]:
+        if not cls.get_question_bank().count(match.level):
             return False
             
-        seen1 = await fetch_seen_question_ids(match.players[0].user_id, match.level)
-        seen2 = await fetch_seen_question_ids(match.players[1].user_id, match.level)
+        seen1, seen2 = await asyncio.gather(
+            fetch_seen_question_ids(match.players[0].user_id, match.level),
+            fetch_seen_question_ids(match.players[1].user_id, match.level)
+        )
         
         all_seen = seen1.union(seen2)
         
-        available_questions = [q for q in cls._questions[match.level] 
-                              if q["id"] not in all_seen]
+        bank = cls.get_question_bank()
         
-        if not available_questions:
+        question = bank.sample_unseen(match.level, all_seen)
+        
+        if question is None:
             return False
-            
-        question = random.choice(available_questions)
         
         match.question_id = question["id"]
         match.question = question["question"]
         match.correct_answer = question["answer"]
+        match.answer_key = bank.answer_key(question["id"])
         match.started_at = datetime.utcnow()
         
-        for player in match.players:
-            await mark_question_used(player.user_id, question["id"], match.level)
-            
-        return True
+        await mark_questions_used([
+            (player.user_id, question["id"], match.level) for player in match.players
+        ])
 
+        return True
 
-FLOAT_COMPARISON_TOLERANCE = 1e-6
 
-def is_correct_answer(user_answer: str, correct_answer: str) -> bool:
-    user_answer = user_answer.strip().lower()
-    correct_answer = correct_answer.strip().lower()
-    
-    user_answer_normalized = user_answer.replace(',', '.')
-    
-    try:
-        user_fraction = Fraction(user_answer_normalized)
-        correct_fraction = Fraction(correct_answer)
-        return user_fraction == correct_fraction
-    except (ValueError, ZeroDivisionError):
-        pass
-    
-    try:
-        user_float = float(user_answer_normalized)
-        correct_float = float(correct_answer)
-        return abs(user_float - correct_float) < FLOAT_COMPARISON_TOLERANCE
-    except ValueError:
-        pass
-    
-    return user_answer == correct_answer
\ No newline at end of file
+def is_correct_answer(user_answer: str, correct_answer: Union[str, AnswerKey]) -> bool:
+    if not isinstance(correct_answer, AnswerKey):
+        correct_answer = compile_answer(correct_answer)
+    return correct_answer.matches(user_answer)
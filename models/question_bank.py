@@ -0,0 +1,87 @@
+from typing import Dict, List, Optional, Set, Iterable
+import random
+from .answers import AnswerKey, compile_answer
+
+REJECTION_SAMPLING_ATTEMPTS = 8
+
+
+class QuestionBank:
+    def __init__(self):
+        self._by_id: Dict[int, Dict] = {}
+        self._answer_keys: Dict[int, AnswerKey] = {}
+        self._level_ids: Dict[str, List[int]] = {}
+        self._level_positions: Dict[str, Dict[int, int]] = {}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, List[Dict]]) -> 'QuestionBank':
+        bank = cls()
+        for level, questions in data.items():
+            bank._level_ids.setdefault(level, [])
+            bank._level_positions.setdefault(level, {})
+            for question in questions:
+                if bank._index(level, question["id"], question["answer"], question.get("accepted", ())):
+                    bank._by_id[question["id"]] = question
+        return bank
+
+    def _index(self, level: str, question_id: int, answer: str, accepted: Iterable[str] = ()) -> bool:
+        positions = self._level_positions.setdefault(level, {})
+        if question_id in positions:
+            return False
+        ids = self._level_ids.setdefault(level, [])
+        positions[question_id] = len(ids)
+        ids.append(question_id)
+        self._answer_keys[question_id] = compile_answer(answer, accepted)
+        return True
+
+    def close(self) -> None:
+        pass
+
+    def __bool__(self) -> bool:
+        return bool(self._answer_keys)
+
+    def levels(self) -> List[str]:
+        return list(self._level_ids)
+
+    def get(self, question_id: int) -> Optional[Dict]:
+        return self._by_id.get(question_id)
+
+    def answer_key(self, question_id: int) -> Optional[AnswerKey]:
+        return self._answer_keys.get(question_id)
+
+    def count(self, level: str) -> int:
+        return len(self._level_ids.get(level, ()))
+
+    def questions_by_level(self, level: str) -> List[Dict]:
+        return [self.get(question_id) for question_id in self._level_ids.get(level, ())]
+
+    def _seen_positions(self, level: str, seen: Iterable[int]) -> Set[int]:
+        positions = self._level_positions.get(level, {})
+        return {positions[question_id] for question_id in seen if question_id in positions}
+
+    def unseen_count(self, level: str, seen: Iterable[int]) -> int:
+        return self.count(level) - len(self._seen_positions(level, seen))
+
+    def has_unseen(self, level: str, seen: Iterable[int]) -> bool:
+        return self.unseen_count(level, seen) > 0
+
+    def sample_unseen(self, level: str, seen: Set[int]) -> Optional[Dict]:
+        ids = self._level_ids.get(level)
+        if not ids:
+            return None
+
+        for _ in range(REJECTION_SAMPLING_ATTEMPTS):
+            question_id = ids[random.randrange(len(ids))]
+            if question_id not in seen:
+                return self.get(question_id)
+
+        seen_positions = sorted(self._seen_positions(level, seen))
+        unseen = len(ids) - len(seen_positions)
+        if unseen <= 0:
+            return None
+
+        index = random.randrange(unseen)
+        for position in seen_positions:
+            if position > index:
+                break
+            index += 1
+        return self.get(ids[index])
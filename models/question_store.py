@@ -0,0 +1,206 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from config import QUESTIONS_PATH, QUESTION_STORE, QUESTIONS_INDEX_DIR, QUESTIONS_RELOAD_INTERVAL, QUESTION_TEXT_CACHE_SIZE
+from .question_bank import QuestionBank
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 2
+
+EMPTY_BANK = {"easy": [], "medium": [], "hard": []}
+
+
+class IndexedQuestionBank(QuestionBank):
+    def __init__(self, path: str, cache_size: int = QUESTION_TEXT_CACHE_SIZE):
+        super().__init__()
+        self.path = path
+        self.cache_size = cache_size
+        self._connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._cache: OrderedDict[int, Dict] = OrderedDict()
+
+    @classmethod
+    def open(cls, path: str) -> 'IndexedQuestionBank':
+        bank = cls(path)
+        for (level,) in bank._connection.execute("SELECT name FROM levels ORDER BY rowid"):
+            bank._level_ids[level] = []
+            bank._level_positions[level] = {}
+        rows = bank._connection.execute(
+            "SELECT id, level, answer, accepted FROM questions ORDER BY level, position"
+        )
+        for question_id, level, answer, accepted in rows:
+            bank._index(level, question_id, answer, json.loads(accepted))
+        return bank
+
+    def get(self, question_id: int) -> Optional[Dict]:
+        question = self._cache.get(question_id)
+        if question is not None:
+            self._cache.move_to_end(question_id)
+            return question
+        if question_id not in self._answer_keys:
+            return None
+
+        row = self._connection.execute("SELECT payload FROM questions WHERE id = ?", (question_id,)).fetchone()
+        if row is None:
+            return None
+        question = json.loads(row[0])
+        self._cache[question_id] = question
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return question
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def source_digest(source: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(str(INDEX_FORMAT_VERSION).encode())
+    with open(source, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def check_unique_ids(data: Dict[str, List[Dict]]) -> None:
+    levels: Dict[int, str] = {}
+    for level, questions in data.items():
+        for question in questions:
+            question_id = question["id"]
+            if question_id in levels:
+                raise ValueError(f"Duplicate question id {question_id} in levels {levels[question_id]} and {level}")
+            levels[question_id] = level
+
+
+def build_index(data: Dict[str, List[Dict]], path: str) -> None:
+    check_unique_ids(data)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(temporary):
+        os.remove(temporary)
+
+    connection = sqlite3.connect(temporary)
+    try:
+        connection.executescript("""
+            CREATE TABLE levels (name TEXT PRIMARY KEY);
+            CREATE TABLE questions (
+                id INTEGER PRIMARY KEY,
+                level TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                answer TEXT NOT NULL,
+                accepted TEXT NOT NULL,
+                payload TEXT NOT NULL
+            );
+        """)
+        for level, questions in data.items():
+            connection.execute("INSERT INTO levels (name) VALUES (?)", (level,))
+            connection.executemany(
+                "INSERT INTO questions (id, level, position, answer, accepted, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        question["id"],
+                        level,
+                        position,
+                        str(question["answer"]),
+                        json.dumps(list(question.get("accepted", ())), ensure_ascii=False),
+                        json.dumps(question, ensure_ascii=False)
+                    )
+                    for position, question in enumerate(questions)
+                )
+            )
+        connection.execute("CREATE INDEX questions_level_position ON questions (level, position)")
+        connection.commit()
+    except Exception:
+        connection.close()
+        os.remove(temporary)
+        raise
+    connection.close()
+    os.replace(temporary, path)
+
+
+class QuestionStore:
+    def __init__(self, source: str = QUESTIONS_PATH, backend: str = QUESTION_STORE,
+                 index_dir: str = QUESTIONS_INDEX_DIR, reload_interval: float = QUESTIONS_RELOAD_INTERVAL):
+        self.source = source
+        self.backend = backend
+        self.index_dir = index_dir
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self._signature: Optional[Tuple[int, int]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.source)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _index_path(self, digest: str) -> str:
+        stem = os.path.splitext(os.path.basename(self.source))[0]
+        return os.path.join(self.index_dir, f"{stem}.{digest}.sqlite")
+
+    def _remove_stale_indexes(self, current: str) -> None:
+        stem = os.path.splitext(os.path.basename(self.source))[0]
+        for name in os.listdir(self.index_dir):
+            path = os.path.join(self.index_dir, name)
+            if name.startswith(f"{stem}.") and name.endswith(".sqlite") and path != current:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def load(self) -> QuestionBank:
+        signature = self._stat()
+        if self.backend != "sqlite":
+            with open(self.source, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            check_unique_ids(data)
+            bank = QuestionBank.from_dict(data)
+            self._signature = signature
+            return bank
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        path = self._index_path(source_digest(self.source))
+        if not os.path.exists(path):
+            with open(self.source, "r", encoding="utf-8") as f:
+                build_index(json.load(f), path)
+        bank = IndexedQuestionBank.open(path)
+        self._signature = signature
+        self._remove_stale_indexes(path)
+        return bank
+
+    def start(self, on_reload: Callable[[QuestionBank], None]) -> None:
+        if self.reload_interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch(on_reload))
+
+    def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    async def _watch(self, on_reload: Callable[[QuestionBank], None]):
+        try:
+            while True:
+                await asyncio.sleep(self.reload_interval)
+                signature = self._stat()
+                if signature is None or signature == self._signature:
+                    continue
+                try:
+                    bank = await asyncio.to_thread(self.load)
+                except (OSError, ValueError, KeyError, TypeError, sqlite3.Error) as e:
+                    logger.warning("Failed to reload %s, keeping the current question bank: %s", self.source, e)
+                    self._signature = signature
+                    continue
+                self.reloads += 1
+                on_reload(bank)
+                logger.info("Reloaded %s: %s", self.source, {level: bank.count(level) for level in bank.levels()})
+        except asyncio.CancelledError:
+            pass
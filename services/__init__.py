@@ -0,0 +1,55 @@
+from .ranking import RankIndex
+from .leaderboard import LeaderboardService, leaderboard
+from .outbound import (
+    OutboundDispatcher,
+    outbound,
+    PRIORITY_RESULT,
+    PRIORITY_NORMAL,
+    PRIORITY_TIMER
+)
+from .timers import TimerRenderer, timer_renderer, format_time
+from .scheduler import DeadlineScheduler, scheduler
+from .matchmaking import MatchmakingQueue
+from .state import StateBackend, InMemoryStateBackend, RedisStateBackend, RematchRecord, state
+from .matchmaker import Matchmaker, matchmaker
+from .snapshot import StateSnapshotter, snapshotter
+from .metrics import (
+    MetricsRegistry,
+    registry,
+    instrument_routers,
+    instrument_bot,
+    instrument_engine,
+    start_metrics_server
+)
+
+__all__ = [
+    'RankIndex',
+    'LeaderboardService',
+    'leaderboard',
+    'OutboundDispatcher',
+    'outbound',
+    'PRIORITY_RESULT',
+    'PRIORITY_NORMAL',
+    'PRIORITY_TIMER',
+    'TimerRenderer',
+    'timer_renderer',
+    'format_time',
+    'DeadlineScheduler',
+    'scheduler',
+    'MatchmakingQueue',
+    'StateBackend',
+    'InMemoryStateBackend',
+    'RedisStateBackend',
+    'RematchRecord',
+    'state',
+    'Matchmaker',
+    'matchmaker',
+    'StateSnapshotter',
+    'snapshotter',
+    'MetricsRegistry',
+    'registry',
+    'instrument_routers',
+    'instrument_bot',
+    'instrument_engine',
+    'start_metrics_server'
+]
@@ -0,0 +1,149 @@
+import asyncio
+import html
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from config import TOP_PLAYERS_LIMIT, LEADERBOARD_NAME_CACHE_SIZE
+from database import get_all_ratings
+from .ranking import RankIndex
+
+RankedEntry = Tuple[int, int, int]
+
+
+class LeaderboardService:
+    def __init__(self, limit: int = TOP_PLAYERS_LIMIT, name_cache_size: int = LEADERBOARD_NAME_CACHE_SIZE):
+        self.limit = limit
+        self.name_cache_size = max(name_cache_size, limit)
+        self.name_lookups = 0
+        self._index = RankIndex()
+        self._names: OrderedDict[int, str] = OrderedDict()
+        self._pending: Dict[int, Tuple[int, Optional[str]]] = {}
+        self._text: Optional[str] = None
+        self._stale = True
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def invalidate(self) -> None:
+        self._stale = True
+        self._text = None
+
+    async def load(self) -> int:
+        async with self._lock:
+            await self._load()
+        return len(self._index)
+
+    async def _load(self) -> None:
+        self._index = RankIndex.build(await get_all_ratings())
+        self._stale = False
+        self._text = None
+        pending, self._pending = self._pending, {}
+        for user_id, (rating, name) in pending.items():
+            self.on_rating_change(user_id, rating, name)
+
+    async def _ensure_loaded(self) -> None:
+        if self._stale:
+            async with self._lock:
+                if self._stale:
+                    await self._load()
+
+    def on_rating_change(self, user_id: int, rating: int, name: Optional[str] = None) -> None:
+        if self._stale:
+            self._pending[user_id] = (rating, name)
+            return
+
+        if name:
+            self._remember(user_id, name)
+        previous_rank = self._index.rank(user_id)
+        self._index.update(user_id, rating)
+        in_top = self._index.rank(user_id) <= self.limit
+        if in_top or (previous_rank is not None and previous_rank <= self.limit):
+            self._text = None
+
+    async def rank(self, user_id: int, rating: Optional[int] = None) -> Tuple[Optional[int], int]:
+        await self._ensure_loaded()
+        if user_id not in self._index and rating is not None:
+            self.on_rating_change(user_id, rating)
+        return self._index.rank(user_id), len(self._index)
+
+    async def page_count(self) -> int:
+        await self._ensure_loaded()
+        return max(1, -(-len(self._index) // self.limit))
+
+    async def get_text(self, bot) -> str:
+        await self._ensure_loaded()
+        async with self._lock:
+            if self._text is None:
+                entries = self._ranked(0, self._index.page(0, self.limit))
+                names = await self._resolve_names(bot, entries)
+                self._text = self._render(f"🏆 Турнирная таблица (топ-{self.limit}):", entries, names)
+            return self._text
+
+    async def get_page_text(self, bot, page: int) -> str:
+        if page <= 1:
+            return await self.get_text(bot)
+        await self._ensure_loaded()
+        offset = (page - 1) * self.limit
+        entries = self._ranked(offset, self._index.page(offset, self.limit))
+        if not entries:
+            return "На этой странице пока никого нет."
+        names = await self._resolve_names(bot, entries)
+        return self._render(f"🏆 Турнирная таблица (места {offset + 1}–{offset + len(entries)}):", entries, names)
+
+    async def get_around_text(self, bot, user_id: int, rating: Optional[int] = None) -> str:
+        rank, _ = await self.rank(user_id, rating)
+        if rank is None:
+            return "Тебя пока нет в турнирной таблице. Сыграй первый бой!"
+        entries = self._index.around(user_id, self.limit // 2)
+        names = await self._resolve_names(bot, entries)
+        return self._render(f"📍 Твоё место: {rank}", entries, names, highlight=user_id)
+
+    def _ranked(self, offset: int, entries: List[Tuple[int, int]]) -> List[RankedEntry]:
+        return [(offset + i + 1, user_id, rating) for i, (user_id, rating) in enumerate(entries)]
+
+    def name_cache_stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._names),
+            "max_size": self.name_cache_size,
+            "lookups": self.name_lookups
+        }
+
+    def _remember(self, user_id: int, name: str) -> None:
+        self._names[user_id] = name
+        self._names.move_to_end(user_id)
+        while len(self._names) > self.name_cache_size:
+            self._names.popitem(last=False)
+
+    async def _resolve_names(self, bot, entries: List[RankedEntry]) -> Dict[int, str]:
+        names = {}
+        missing = []
+        for _, user_id, _ in entries:
+            name = self._names.get(user_id)
+            if name is None:
+                missing.append(user_id)
+            else:
+                self._names.move_to_end(user_id)
+                names[user_id] = name
+        if missing:
+            self.name_lookups += len(missing)
+            chats = await asyncio.gather(*(bot.get_chat(user_id) for user_id in missing), return_exceptions=True)
+            for user_id, chat in zip(missing, chats):
+                if isinstance(chat, Exception) or not chat.first_name:
+                    names[user_id] = f"Игрок {user_id}"
+                else:
+                    names[user_id] = chat.first_name
+                    self._remember(user_id, chat.first_name)
+        return names
+
+    def _render(self, title: str, entries: List[RankedEntry], names: Dict[int, str],
+                highlight: Optional[int] = None) -> str:
+        if not entries:
+            return "Турнирная таблица пуста."
+        text = f"{title}\n\n"
+        for rank, user_id, rating in entries:
+            line = f"{rank}. {html.escape(names.get(user_id, f'Игрок {user_id}'))} — {rating} очков"
+            text += f"<b>{line}</b>\n" if user_id == highlight else f"{line}\n"
+        return text
+
+
+leaderboard = LeaderboardService()
@@ -0,0 +1,237 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+from config import (
+    MATCHMAKING_INTERVAL,
+    MATCH_RATING_WINDOW,
+    MATCH_RATING_WINDOW_GROWTH,
+    MATCH_RATING_WINDOW_MAX,
+    MATCH_LEVEL_FALLBACK_AFTER,
+    TIME_TO_MATCH_SAMPLES
+)
+from models import Player
+from .state import LEVELS, StateBackend, state
+
+logger = logging.getLogger(__name__)
+
+ADJACENT_LEVELS = tuple(zip(LEVELS, LEVELS[1:]))
+ARRIVAL_ATTEMPTS = 3
+
+Candidate = Tuple[Player, str, float]
+Pairing = Tuple[Player, Player, str]
+
+
+def rating_window(waited: float, base: int = MATCH_RATING_WINDOW, growth: float = MATCH_RATING_WINDOW_GROWTH,
+                  limit: int = MATCH_RATING_WINDOW_MAX) -> float:
+    return min(base + growth * max(waited, 0.0), limit)
+
+
+def plan_pairs(candidates: Sequence[Candidate], window: Callable[[float], float] = rating_window,
+               compatible: Optional[Callable[[Candidate, Candidate], bool]] = None) -> List[Tuple[int, int]]:
+    count = len(candidates)
+    if count < 2:
+        return []
+
+    by_rating = sorted(range(count), key=lambda i: (candidates[i][0].rating, candidates[i][2]))
+    position = {index: rank for rank, index in enumerate(by_rating)}
+    left = list(range(-1, count - 1))
+    right = list(range(1, count + 1))
+    widest = window(max(candidate[2] for candidate in candidates))
+
+    def unlink(rank: int) -> None:
+        if left[rank] >= 0:
+            right[left[rank]] = right[rank]
+        if right[rank] < count:
+            left[right[rank]] = left[rank]
+
+    pairs = []
+    matched = [False] * count
+    for index in sorted(range(count), key=lambda i: -candidates[i][2]):
+        if matched[index]:
+            continue
+        player, _, waited = candidates[index]
+        own_window = window(waited)
+        reach = max(own_window, widest)
+        best = None
+        best_distance = None
+        rank = position[index]
+        for step in (left, right):
+            neighbour = step[rank]
+            while 0 <= neighbour < count:
+                other = by_rating[neighbour]
+                distance = abs(candidates[other][0].rating - player.rating)
+                if distance > reach or (best_distance is not None and distance > best_distance):
+                    break
+                if distance <= max(own_window, window(candidates[other][2])) and (
+                    compatible is None or compatible(candidates[index], candidates[other])
+                ):
+                    if best_distance is None or distance < best_distance or (
+                        distance == best_distance and candidates[other][2] > candidates[best][2]
+                    ):
+                        best, best_distance = other, distance
+                    break
+                neighbour = step[neighbour]
+        if best is None:
+            continue
+        matched[index] = matched[best] = True
+        unlink(rank)
+        unlink(position[best])
+        pairs.append((index, best))
+    return pairs
+
+
+def fallback_compatible(after: float) -> Callable[[Candidate, Candidate], bool]:
+    def compatible(first: Candidate, second: Candidate) -> bool:
+        return first[1] != second[1] and max(first[2], second[2]) >= after
+    return compatible
+
+
+def match_level(first: Candidate, second: Candidate, after: float = MATCH_LEVEL_FALLBACK_AFTER) -> str:
+    if first[1] == second[1]:
+        return first[1]
+    if first[2] >= after and second[2] < after:
+        return second[1]
+    if second[2] >= after and first[2] < after:
+        return first[1]
+    return first[1] if first[2] >= second[2] else second[1]
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Matchmaker:
+    def __init__(self, backend: StateBackend = state, interval: float = MATCHMAKING_INTERVAL,
+                 fallback_after: float = MATCH_LEVEL_FALLBACK_AFTER, samples: int = TIME_TO_MATCH_SAMPLES):
+        self.backend = backend
+        self.interval = interval
+        self.fallback_after = fallback_after
+        self.passes = 0
+        self.matched = 0
+        self.fallback_matches = 0
+        self.last_pass_duration = 0.0
+        self._waits: Dict[str, Deque[float]] = {level: deque(maxlen=samples) for level in LEVELS}
+        self._wait_totals: Dict[str, float] = {level: 0.0 for level in LEVELS}
+        self._wait_counts: Dict[str, int] = {level: 0 for level in LEVELS}
+        self._on_pair: Optional[Callable[[Player, Player, str], Awaitable]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def match_arrival(self, player: Player, level: str) -> Optional[Pairing]:
+        nearby = await self.backend.nearby_players(level, player.rating, rating_window(0.0))
+        arrival = next(((queued, level, waited) for queued, waited in nearby if queued.user_id == player.user_id), None)
+        if arrival is None:
+            return None
+
+        candidates = sorted(
+            ((queued, level, waited) for queued, waited in nearby if queued.user_id != player.user_id),
+            key=lambda candidate: (abs(candidate[0].rating - player.rating), -candidate[2])
+        )
+        for candidate in candidates[:ARRIVAL_ATTEMPTS]:
+            pairing = await self._take(candidate, arrival)
+            if pairing is not None:
+                return pairing
+            if not await self.backend.is_queued(player.user_id):
+                return None
+        return None
+
+    async def run_pass(self) -> List[Pairing]:
+        async with self._lock:
+            started = asyncio.get_running_loop().time()
+            waiting = await self.backend.waiting_players()
+            leftovers: Dict[str, List[Candidate]] = {}
+            pairings: List[Pairing] = []
+
+            for level, entries in waiting.items():
+                candidates = [(player, level, waited) for player, waited in entries]
+                paired = set()
+                for first, second in plan_pairs(candidates):
+                    paired.update((first, second))
+                    pairing = await self._take(candidates[first], candidates[second])
+                    if pairing is not None:
+                        pairings.append(pairing)
+                leftovers[level] = [candidate for i, candidate in enumerate(candidates) if i not in paired]
+
+            if self.fallback_after > 0:
+                compatible = fallback_compatible(self.fallback_after)
+                for lower, upper in ADJACENT_LEVELS:
+                    candidates = leftovers.get(lower, []) + leftovers.get(upper, [])
+                    if not any(candidate[2] >= self.fallback_after for candidate in candidates):
+                        continue
+                    paired = set()
+                    for first, second in plan_pairs(candidates, compatible=compatible):
+                        paired.update((candidates[first][0].user_id, candidates[second][0].user_id))
+                        pairing = await self._take(candidates[first], candidates[second])
+                        if pairing is not None:
+                            self.fallback_matches += 1
+                            pairings.append(pairing)
+                    for level in (lower, upper):
+                        leftovers[level] = [
+                            candidate for candidate in leftovers.get(level, []) if candidate[0].user_id not in paired
+                        ]
+
+            self.passes += 1
+            self.last_pass_duration = asyncio.get_running_loop().time() - started
+            return pairings
+
+    async def _take(self, first: Candidate, second: Candidate) -> Optional[Pairing]:
+        taken = await self.backend.take_players([first[0].user_id, second[0].user_id])
+        if taken is None:
+            return None
+        for _, level, waited in taken:
+            self._waits[level].append(waited)
+            self._wait_totals[level] += waited
+            self._wait_counts[level] += 1
+        self.matched += 1
+        return first[0], second[0], match_level(first, second, self.fallback_after)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            level: {
+                "p50": percentile(waits, 0.5),
+                "p95": percentile(waits, 0.95),
+                "samples": len(waits),
+                "total": self._wait_totals[level],
+                "count": self._wait_counts[level]
+            }
+            for level, waits in self._waits.items()
+        }
+
+    def start(self, on_pair: Callable[[Player, Player, str], Awaitable]) -> None:
+        self._on_pair = on_pair
+        if self.interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    async def _run(self):
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                try:
+                    pairings = await self.run_pass()
+                except Exception:
+                    logger.exception("Matchmaking pass failed")
+                    continue
+                if pairings:
+                    results = await asyncio.gather(
+                        *(self._on_pair(first, second, level) for first, second, level in pairings),
+                        return_exceptions=True
+                    )
+                    for result in results:
+                        if isinstance(result, Exception):
+                            logger.error("Failed to start a matched game", exc_info=result)
+        except asyncio.CancelledError:
+            pass
+
+
+matchmaker = Matchmaker()
@@ -0,0 +1,150 @@
+import itertools
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from sortedcontainers import SortedList
+
+
+class QueueNode:
+    __slots__ = ("player", "level", "key", "enqueued_at", "prev", "next")
+
+    def __init__(self, player, level: str, key: Tuple[int, int]):
+        self.player = player
+        self.level = level
+        self.key = key
+        self.enqueued_at = time.monotonic()
+        self.prev: Optional['QueueNode'] = None
+        self.next: Optional['QueueNode'] = None
+
+
+class LevelQueue:
+    def __init__(self):
+        self.head: Optional[QueueNode] = None
+        self.tail: Optional[QueueNode] = None
+        self.size = 0
+        self.matched = 0
+        self.total_wait = 0.0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[QueueNode]:
+        node = self.head
+        while node is not None:
+            yield node
+            node = node.next
+
+    def append(self, node: QueueNode) -> None:
+        node.prev = self.tail
+        node.next = None
+        if self.tail is None:
+            self.head = node
+        else:
+            self.tail.next = node
+        self.tail = node
+        self.size += 1
+
+    def unlink(self, node: QueueNode) -> None:
+        if node.prev is None:
+            self.head = node.next
+        else:
+            node.prev.next = node.next
+        if node.next is None:
+            self.tail = node.prev
+        else:
+            node.next.prev = node.prev
+        node.prev = node.next = None
+        self.size -= 1
+
+
+class MatchmakingQueue:
+    def __init__(self, levels: Iterable[str]):
+        self._levels: Dict[str, LevelQueue] = {level: LevelQueue() for level in levels}
+        self._index: Dict[int, QueueNode] = {}
+        self._by_rating: Dict[str, SortedList] = {level: SortedList() for level in self._levels}
+        self._nodes: Dict[Tuple[int, int], QueueNode] = {}
+        self._sequence = itertools.count()
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._index
+
+    def levels(self):
+        return self._levels.keys()
+
+    def depth(self, level: str) -> int:
+        return len(self._levels[level])
+
+    def level_of(self, user_id: int) -> Optional[str]:
+        node = self._index.get(user_id)
+        return node.level if node else None
+
+    def players(self, level: str):
+        return [node.player for node in self._levels[level]]
+
+    def waiting(self, level: str) -> List[Tuple[object, float]]:
+        now = time.monotonic()
+        return [(node.player, now - node.enqueued_at) for node in self._levels[level]]
+
+    def nearby(self, level: str, rating: int, radius: float) -> List[Tuple[object, float]]:
+        keys = self._by_rating[level].irange((rating - radius,), (rating + radius, float("inf")))
+        now = time.monotonic()
+        nodes = (self._nodes[key] for key in keys)
+        return [(node.player, now - node.enqueued_at) for node in nodes]
+
+    def enqueue(self, player, level: str, waited: float = 0.0) -> bool:
+        if player.user_id in self._index:
+            return False
+        node = QueueNode(player, level, (player.rating, next(self._sequence)))
+        node.enqueued_at -= waited
+        self._levels[level].append(node)
+        self._index[player.user_id] = node
+        self._nodes[node.key] = node
+        self._by_rating[level].add(node.key)
+        return True
+
+    def cancel(self, user_id: int) -> bool:
+        node = self._index.pop(user_id, None)
+        if node is None:
+            return False
+        self._levels[node.level].unlink(node)
+        self._unindex(node)
+        return True
+
+    def take(self, user_ids: Iterable[int]) -> Optional[List[Tuple[object, str, float]]]:
+        nodes = [self._index.get(user_id) for user_id in dict.fromkeys(user_ids)]
+        if not nodes or any(node is None for node in nodes):
+            return None
+        now = time.monotonic()
+        return [(self._take(node).player, node.level, now - node.enqueued_at) for node in nodes]
+
+    def pop_pair(self, level: str) -> Optional[Tuple[object, object]]:
+        queue = self._levels[level]
+        if len(queue) < 2:
+            return None
+        first = queue.head
+        second = first.next
+        return self._take(first).player, self._take(second).player
+
+    def _take(self, node: QueueNode) -> QueueNode:
+        queue = self._levels[node.level]
+        queue.unlink(node)
+        del self._index[node.player.user_id]
+        self._unindex(node)
+        queue.matched += 1
+        queue.total_wait += time.monotonic() - node.enqueued_at
+        return node
+
+    def _unindex(self, node: QueueNode) -> None:
+        self._by_rating[node.level].remove(node.key)
+        del self._nodes[node.key]
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        now = time.monotonic()
+        result = {}
+        for level, queue in self._levels.items():
+            result[level] = {
+                "depth": len(queue),
+                "oldest_wait": now - queue.head.enqueued_at if queue.head else 0.0,
+                "matched": queue.matched,
+                "avg_wait": queue.total_wait / queue.matched if queue.matched else 0.0
+            }
+        return result
@@ -0,0 +1,380 @@
+import asyncio
+import bisect
+import logging
+import re
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+from aiogram import BaseMiddleware, Router
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from sqlalchemy import event
+from config import METRICS_HOST, METRICS_PORT
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+INF_BUCKET = 'le="+Inf"'
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+_STATEMENT_RE = re.compile(r"^\s*(\w+)")
+_TABLE_RE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE)\s+\"?(\w+)", re.IGNORECASE)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace("\"", "\\\"")
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _check(self, labels: LabelValues) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple(str(label) for label in labels)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples()
+        ]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._check(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(self._check(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[self._check(labels)] = value
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(self._check(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._check(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(self._check(labels))
+        return series[2] if series else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, INF_BUCKET)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Summary(Metric):
+    kind = "summary"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._series: Dict[LabelValues, Tuple[Dict[float, float], float, int]] = {}
+
+    def set(self, quantiles: Dict[float, float], total: float, count: int, *labels: str) -> None:
+        self._series[self._check(labels)] = (dict(quantiles), total, count)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, (quantiles, total, count) in sorted(self._series.items()):
+            for quantile, value in sorted(quantiles.items()):
+                extra = f'quantile="{_format_value(quantile)}"'
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels, extra)} {_format_value(value)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Awaitable[None]]] = []
+
+    def _register(self, metric: Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def summary(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Summary:
+        return self._register(Summary(name, documentation, labelnames))
+
+    def add_collector(self, collector: Callable[[], Awaitable[None]]) -> None:
+        self._collectors.append(collector)
+
+    async def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                await collector()
+            except Exception as e:
+                logger.warning("Metrics collector %s failed: %s", getattr(collector, "__name__", collector), e)
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+handler_duration = registry.histogram(
+    "battlestudy_handler_duration_seconds", "Time spent in update handlers", ("router", "handler")
+)
+handler_errors = registry.counter(
+    "battlestudy_handler_errors_total", "Update handlers that raised", ("router", "handler")
+)
+db_statement_duration = registry.histogram(
+    "battlestudy_db_statement_duration_seconds", "Database statement execution time", ("operation", "table")
+)
+db_statement_errors = registry.counter(
+    "battlestudy_db_statement_errors_total", "Database statements that failed", ("operation", "table")
+)
+telegram_request_duration = registry.histogram(
+    "battlestudy_telegram_request_duration_seconds", "Telegram Bot API call latency", ("method",)
+)
+telegram_request_errors = registry.counter(
+    "battlestudy_telegram_request_errors_total", "Telegram Bot API calls that failed", ("method", "error")
+)
+queue_depth = registry.gauge("battlestudy_queue_depth", "Players waiting for an opponent", ("level",))
+active_matches = registry.gauge("battlestudy_active_matches", "Matches in progress")
+pending_rematches = registry.gauge("battlestudy_pending_rematches", "Rematch offers awaiting votes")
+cache_stats = registry.gauge("battlestudy_cache", "In-process cache statistics", ("cache", "stat"))
+match_results = registry.gauge("battlestudy_match_results", "Match history writer statistics", ("stat",))
+db_pool = registry.gauge("battlestudy_db_pool", "Database connection pool statistics", ("stat",))
+pending_deadlines = registry.gauge("battlestudy_pending_deadlines", "Deadlines waiting in the scheduler", ("kind",))
+deadline_lateness = registry.gauge(
+    "battlestudy_deadline_lateness_seconds", "How late scheduled deadlines fired", ("stat",)
+)
+time_to_match = registry.summary(
+    "battlestudy_time_to_match_seconds", "Time from joining the queue to getting an opponent", ("level",)
+)
+matchmaking_passes = registry.gauge("battlestudy_matchmaking", "Batch matchmaking statistics", ("stat",))
+state_snapshots = registry.gauge("battlestudy_state_snapshots", "Live state snapshot writer statistics", ("stat",))
+background_tasks = registry.gauge("battlestudy_background_tasks", "Running background tasks", ("kind",))
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    async def __call__(self, handler: Callable, event: Any, data: Dict[str, Any]) -> Any:
+        handler_object = data.get("handler")
+        callback = getattr(handler_object, "callback", None)
+        router_name = getattr(callback, "__module__", "unknown").rsplit(".", 1)[-1]
+        handler_name = getattr(callback, "__name__", "unknown")
+
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            handler_errors.inc(router_name, handler_name)
+            raise
+        finally:
+            handler_duration.observe(time.perf_counter() - started, router_name, handler_name)
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    async def __call__(self, make_request, bot, method):
+        method_name = getattr(method, "__api_method__", type(method).__name__)
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            telegram_request_errors.inc(method_name, type(e).__name__)
+            raise
+        finally:
+            telegram_request_duration.observe(time.perf_counter() - started, method_name)
+
+
+@lru_cache(maxsize=512)
+def statement_labels(statement: str) -> Tuple[str, str]:
+    operation = _STATEMENT_RE.match(statement)
+    table = _TABLE_RE.search(statement)
+    return (
+        operation.group(1).upper() if operation else "UNKNOWN",
+        table.group(1) if table else ""
+    )
+
+
+def instrument_routers(*routers: Router) -> None:
+    middleware = HandlerMetricsMiddleware()
+    for router in routers:
+        router.message.middleware(middleware)
+        router.callback_query.middleware(middleware)
+
+
+def instrument_bot(bot) -> None:
+    bot.session.middleware(TelegramMetricsMiddleware())
+
+
+def instrument_engine(engine) -> None:
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_started"].pop()
+        db_statement_duration.observe(time.perf_counter() - started, *statement_labels(statement))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get("metrics_started") if context.connection is not None else None
+        if stack:
+            stack.pop()
+        db_statement_errors.inc(*statement_labels(context.statement or ""))
+
+
+async def collect_runtime() -> None:
+    from database import db_manager, profile_cache, seen_questions_cache, result_writer
+    from .outbound import outbound
+    from .leaderboard import leaderboard
+    from .matchmaker import matchmaker
+    from .scheduler import scheduler
+    from .snapshot import snapshotter
+    from .state import state
+    from .timers import timer_renderer
+
+    depths = await state.queue_depths()
+    for level, depth in depths.items():
+        queue_depth.set(depth, level)
+    for level, stats in matchmaker.stats().items():
+        time_to_match.set({0.5: stats["p50"], 0.95: stats["p95"]}, stats["total"], stats["count"], level)
+    matchmaking_passes.set(matchmaker.passes, "passes")
+    matchmaking_passes.set(matchmaker.matched, "matched")
+    matchmaking_passes.set(matchmaker.fallback_matches, "fallback_matched")
+    matchmaking_passes.set(matchmaker.last_pass_duration, "last_pass_seconds")
+    active_matches.set(await state.match_count())
+    pending_rematches.set(await state.rematch_count())
+
+    for stat, value in db_manager.pool_stats().items():
+        db_pool.set(value, stat)
+    for stat, value in result_writer.stats().items():
+        match_results.set(value, stat)
+    for stat, value in snapshotter.stats().items():
+        state_snapshots.set(value, stat)
+    for name, cache in (("profile", profile_cache), ("seen_questions", seen_questions_cache)):
+        for stat, value in cache.stats().items():
+            cache_stats.set(value, name, stat)
+    for stat, value in leaderboard.name_cache_stats().items():
+        cache_stats.set(value, "leaderboard_names", stat)
+
+    pending = scheduler.pending_by_kind()
+    for kind in ("match", "rematch"):
+        pending_deadlines.set(pending.get(kind, 0), kind)
+    scheduler_stats = scheduler.stats()
+    deadline_lateness.set(scheduler_stats["lateness_avg"], "avg")
+    deadline_lateness.set(scheduler_stats["lateness_max"], "max")
+    background_tasks.set(scheduler_stats["running_callbacks"], "deadline_callbacks")
+    background_tasks.set(len(timer_renderer), "timer_render")
+    background_tasks.set(outbound.pending(), "outbound_pending")
+    background_tasks.set(len(asyncio.all_tasks()), "asyncio_total")
+
+
+registry.add_collector(collect_runtime)
+
+
+async def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT):
+    from aiohttp import web
+
+    async def handle(request: web.Request) -> web.Response:
+        body = await registry.render()
+        return web.Response(body=body.encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host=host, port=port)
+    await site.start()
+    logger.info("Metrics endpoint listening on %s:%s/metrics", host, port)
+    return runner
@@ -0,0 +1,207 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from aiogram.exceptions import TelegramRetryAfter
+from config import (
+    OUTBOUND_GLOBAL_RATE,
+    OUTBOUND_GLOBAL_BURST,
+    OUTBOUND_CHAT_RATE,
+    OUTBOUND_CHAT_BURST,
+    OUTBOUND_MAX_RETRIES
+)
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_RESULT = 0
+PRIORITY_NORMAL = 1
+PRIORITY_TIMER = 2
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    async def take(self) -> None:
+        while not self.try_take():
+            await asyncio.sleep(self.wait_time())
+
+
+class PriorityLimiter:
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    async def acquire(self, priority: int) -> None:
+        if not self._waiters and self.bucket.try_take():
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._grant())
+        await future
+
+    async def _grant(self):
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():
+                heapq.heappop(self._waiters)
+            elif self.bucket.try_take():
+                heapq.heappop(self._waiters)
+                future.set_result(None)
+            else:
+                await asyncio.sleep(self.bucket.wait_time())
+
+
+class OutboundJob:
+    __slots__ = ("method", "priority", "args", "kwargs", "future")
+
+    def __init__(self, method: str, priority: int, args: tuple, kwargs: dict, future: asyncio.Future):
+        self.method = method
+        self.priority = priority
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+
+
+class OutboundDispatcher:
+    MAX_IDLE_BUCKETS = 4096
+
+    def __init__(self):
+        self.bot = None
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self._chat_rate = OUTBOUND_CHAT_RATE
+        self._chat_burst = OUTBOUND_CHAT_BURST
+        self._global = PriorityLimiter(TokenBucket(OUTBOUND_GLOBAL_RATE, OUTBOUND_GLOBAL_BURST))
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._lanes: Dict[int, Deque[OutboundJob]] = {}
+        self._lane_tasks: Dict[int, asyncio.Task] = {}
+
+    def set_limits(self, global_rate: float, global_burst: float, chat_rate: float, chat_burst: float) -> None:
+        self._global = PriorityLimiter(TokenBucket(global_rate, global_burst))
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._chat_buckets.clear()
+
+    def pending(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def submit(self, method: str, chat_id: int, *args, priority: int = PRIORITY_NORMAL, **kwargs) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(self._log_failure)
+        job = OutboundJob(method, priority, (chat_id,) + args, kwargs, future)
+
+        self._lanes.setdefault(chat_id, deque()).append(job)
+        if chat_id not in self._lane_tasks:
+            self._lane_tasks[chat_id] = asyncio.create_task(self._drain(chat_id))
+        return future
+
+    def send_message(self, chat_id: int, text: str, priority: int = PRIORITY_NORMAL, **kwargs) -> asyncio.Future:
+        return self.submit("send_message", chat_id, text, priority=priority, **kwargs)
+
+    def edit_message_text(self, text: str, chat_id: int, message_id: int,
+                          priority: int = PRIORITY_NORMAL, **kwargs) -> asyncio.Future:
+        return self.submit("edit_message_text", chat_id, priority=priority,
+                           text=text, message_id=message_id, **kwargs)
+
+    def edit_message_reply_markup(self, chat_id: int, message_id: int,
+                                  priority: int = PRIORITY_NORMAL, **kwargs) -> asyncio.Future:
+        return self.submit("edit_message_reply_markup", chat_id, priority=priority,
+                           message_id=message_id, **kwargs)
+
+    async def close(self) -> None:
+        tasks = list(self._lane_tasks.values())
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= self.MAX_IDLE_BUCKETS:
+                self._chat_buckets = {
+                    key: value for key, value in self._chat_buckets.items()
+                    if key in self._lanes or not value.is_full()
+                }
+            bucket = TokenBucket(self._chat_rate, self._chat_burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def _drain(self, chat_id: int):
+        lane = self._lanes[chat_id]
+        bucket = self._chat_bucket(chat_id)
+        try:
+            while lane:
+                job = lane.popleft()
+                if job.future.cancelled():
+                    continue
+                await bucket.take()
+                await self._global.acquire(job.priority)
+                await self._execute(chat_id, job)
+        finally:
+            del self._lanes[chat_id]
+            del self._lane_tasks[chat_id]
+
+    async def _execute(self, chat_id: int, job: OutboundJob):
+        method = getattr(self.bot, job.method)
+        for attempt in range(OUTBOUND_MAX_RETRIES + 1):
+            try:
+                result = await method(*job.args, **job.kwargs)
+            except TelegramRetryAfter as e:
+                if attempt == OUTBOUND_MAX_RETRIES:
+                    self.failed += 1
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                    return
+                self.retried += 1
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                self.failed += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+                return
+            else:
+                self.sent += 1
+                if not job.future.done():
+                    job.future.set_result(result)
+                return
+
+    @staticmethod
+    def _log_failure(future: asyncio.Future) -> None:
+        if future.cancelled():
+            return
+        error: Optional[BaseException] = future.exception()
+        if error is not None:
+            logger.warning("Outbound request failed: %s", error)
+
+
+outbound = OutboundDispatcher()
@@ -0,0 +1,132 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from sortedcontainers import SortedList
+
+MIN_CAPACITY = 1024
+
+
+class RankIndex:
+    def __init__(self, capacity: int = MIN_CAPACITY):
+        self._capacity = MIN_CAPACITY
+        while self._capacity < capacity:
+            self._capacity *= 2
+        self._tree = [0] * (self._capacity + 1)
+        self._buckets: Dict[int, SortedList] = {}
+        self._ratings: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ratings)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._ratings
+
+    @classmethod
+    def build(cls, entries: Iterable[Tuple[int, int]]) -> 'RankIndex':
+        ratings = {user_id: max(rating, 0) for user_id, rating in entries}
+        index = cls(max(ratings.values(), default=0) + 1)
+        buckets: Dict[int, List[int]] = {}
+        for user_id, rating in ratings.items():
+            buckets.setdefault(rating, []).append(user_id)
+        index._buckets = {rating: SortedList(users) for rating, users in buckets.items()}
+        index._ratings = ratings
+        index._rebuild()
+        return index
+
+    def rating_of(self, user_id: int) -> Optional[int]:
+        return self._ratings.get(user_id)
+
+    def update(self, user_id: int, rating: int) -> None:
+        rating = max(rating, 0)
+        previous = self._ratings.get(user_id)
+        if previous == rating:
+            return
+        if previous is not None:
+            self._unlink(user_id, previous)
+        while rating >= self._capacity:
+            self._grow()
+        users = self._buckets.get(rating)
+        if users is None:
+            users = self._buckets[rating] = SortedList()
+        users.add(user_id)
+        self._add(rating, 1)
+        self._ratings[user_id] = rating
+
+    def remove(self, user_id: int) -> bool:
+        rating = self._ratings.pop(user_id, None)
+        if rating is None:
+            return False
+        self._unlink(user_id, rating)
+        return True
+
+    def rank(self, user_id: int) -> Optional[int]:
+        rating = self._ratings.get(user_id)
+        if rating is None:
+            return None
+        return self._above(rating) + self._buckets[rating].bisect_left(user_id) + 1
+
+    def page(self, offset: int, limit: int) -> List[Tuple[int, int]]:
+        entries: List[Tuple[int, int]] = []
+        position = max(offset, 0)
+        while len(entries) < limit and position < len(self._ratings):
+            rating, start = self._locate(position)
+            users = self._buckets[rating][start:start + limit - len(entries)]
+            entries.extend((user_id, rating) for user_id in users)
+            position += len(users)
+        return entries
+
+    def around(self, user_id: int, radius: int) -> List[Tuple[int, int, int]]:
+        rank = self.rank(user_id)
+        if rank is None:
+            return []
+        first = max(rank - 1 - radius, 0)
+        entries = self.page(first, 2 * radius + 1)
+        return [(first + i + 1, entry_user_id, rating) for i, (entry_user_id, rating) in enumerate(entries)]
+
+    def _above(self, rating: int) -> int:
+        return len(self._ratings) - self._prefix(rating)
+
+    def _prefix(self, rating: int) -> int:
+        total = 0
+        position = rating + 1
+        while position > 0:
+            total += self._tree[position]
+            position -= position & -position
+        return total
+
+    def _add(self, rating: int, delta: int) -> None:
+        position = rating + 1
+        while position <= self._capacity:
+            self._tree[position] += delta
+            position += position & -position
+
+    def _locate(self, position: int) -> Tuple[int, int]:
+        remaining = len(self._ratings) - position
+        node = 0
+        step = self._capacity
+        while step:
+            child = node + step
+            if child <= self._capacity and self._tree[child] < remaining:
+                node = child
+                remaining -= self._tree[child]
+            step //= 2
+        rating = node
+        return rating, len(self._buckets[rating]) - remaining
+
+    def _unlink(self, user_id: int, rating: int) -> None:
+        users = self._buckets[rating]
+        users.remove(user_id)
+        if not users:
+            del self._buckets[rating]
+        self._add(rating, -1)
+
+    def _grow(self) -> None:
+        self._capacity *= 2
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self._tree = [0] * (self._capacity + 1)
+        for rating, users in self._buckets.items():
+            self._tree[rating + 1] = len(users)
+        for position in range(1, self._capacity + 1):
+            parent = position + (position & -position)
+            if parent <= self._capacity:
+                self._tree[parent] += self._tree[position]
@@ -0,0 +1,141 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+COMPACT_THRESHOLD = 1024
+
+
+class Deadline:
+    __slots__ = ("when", "key", "callback", "cancelled")
+
+    def __init__(self, when: float, key: Hashable, callback: Callable[[], Awaitable]):
+        self.when = when
+        self.key = key
+        self.callback = callback
+        self.cancelled = False
+
+
+class DeadlineScheduler:
+    def __init__(self):
+        self.fired = 0
+        self.lateness_total = 0.0
+        self.lateness_max = 0.0
+        self._heap: List[Tuple[float, int, Deadline]] = []
+        self._deadlines: Dict[Hashable, Deadline] = {}
+        self._cancelled = 0
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def schedule(self, key: Hashable, delay: float, callback: Callable[[], Awaitable]) -> None:
+        self.cancel(key)
+        loop = asyncio.get_running_loop()
+        deadline = Deadline(loop.time() + delay, key, callback)
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline.when, next(self._sequence), deadline))
+
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        elif self._heap[0][2] is deadline:
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable) -> bool:
+        deadline = self._deadlines.pop(key, None)
+        if deadline is None:
+            return False
+        deadline.cancelled = True
+        self._cancelled += 1
+        if self._cancelled > COMPACT_THRESHOLD and self._cancelled * 2 > len(self._heap):
+            self._compact()
+        return True
+
+    def export(self) -> List[Tuple[Hashable, float]]:
+        offset = time.time() - asyncio.get_running_loop().time()
+        return [(key, deadline.when + offset) for key, deadline in self._deadlines.items()]
+
+    def pending_by_kind(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for key in self._deadlines:
+            kind = str(key[0]) if isinstance(key, tuple) and key else "other"
+            counts[kind] = counts.get(kind, 0) + 1
+        return counts
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "pending": len(self._deadlines),
+            "heap_size": len(self._heap),
+            "running_callbacks": len(self._running),
+            "fired": self.fired,
+            "lateness_avg": self.lateness_total / self.fired if self.fired else 0.0,
+            "lateness_max": self.lateness_max
+        }
+
+    def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        for task in list(self._running):
+            task.cancel()
+        self._heap.clear()
+        self._deadlines.clear()
+        self._cancelled = 0
+
+    def _compact(self) -> None:
+        self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+        heapq.heapify(self._heap)
+        self._cancelled = 0
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            while self._heap and self._heap[0][2].cancelled:
+                heapq.heappop(self._heap)
+                self._cancelled -= 1
+            if not self._heap:
+                return
+
+            delay = self._heap[0][0] - loop.time()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, deadline = heapq.heappop(self._heap)
+            del self._deadlines[deadline.key]
+
+            lateness = loop.time() - deadline.when
+            self.fired += 1
+            self.lateness_total += lateness
+            if lateness > self.lateness_max:
+                self.lateness_max = lateness
+
+            task = asyncio.create_task(deadline.callback())
+            self._running.add(task)
+            task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.error("Deadline callback failed", exc_info=error)
+
+
+scheduler = DeadlineScheduler()
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+from config import STATE_SNAPSHOT_PATH, STATE_SNAPSHOT_INTERVAL, STATE_SNAPSHOT_MAX_AGE
+from .scheduler import DeadlineScheduler, scheduler
+from .state import StateBackend, state
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+def _write_atomic(path: str, payload: bytes) -> None:
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+class StateSnapshotter:
+    def __init__(self, backend: StateBackend = state, deadlines: DeadlineScheduler = scheduler,
+                 path: str = STATE_SNAPSHOT_PATH, interval: float = STATE_SNAPSHOT_INTERVAL,
+                 max_age: float = STATE_SNAPSHOT_MAX_AGE):
+        self.backend = backend
+        self.deadlines = deadlines
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self.saves = 0
+        self.failures = 0
+        self.last_size = 0
+        self.last_duration = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def save(self) -> int:
+        started = time.perf_counter()
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "saved_at": time.time(),
+            "state": await self.backend.export_state(),
+            "deadlines": [[list(key), when] for key, when in self.deadlines.export() if isinstance(key, tuple)]
+        }
+        payload = json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")).encode()
+        await asyncio.to_thread(_write_atomic, self.path, payload)
+        self.saves += 1
+        self.last_size = len(payload)
+        self.last_duration = time.perf_counter() - started
+        return len(payload)
+
+    def load(self) -> Optional[Dict]:
+        try:
+            with open(self.path, "rb") as f:
+                snapshot = json.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable state snapshot %s: %s", self.path, e)
+            return None
+
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            logger.warning("Ignoring state snapshot %s with version %s", self.path, snapshot.get("version"))
+            return None
+        age = time.time() - snapshot["saved_at"]
+        if self.max_age > 0 and age > self.max_age:
+            logger.warning("Ignoring state snapshot %s saved %.0f seconds ago", self.path, age)
+            return None
+        return snapshot
+
+    def start(self) -> None:
+        if self.interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "saves": self.saves,
+            "failures": self.failures,
+            "last_size": self.last_size,
+            "last_duration": self.last_duration
+        }
+
+    async def _run(self):
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                try:
+                    await self.save()
+                except (OSError, TypeError, ValueError) as e:
+                    self.failures += 1
+                    logger.warning("Failed to write state snapshot %s: %s", self.path, e)
+        except asyncio.CancelledError:
+            pass
+
+
+snapshotter = StateSnapshotter()
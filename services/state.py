@@ -0,0 +1,677 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from config import STATE_BACKEND, REDIS_URL, STATE_KEY_PREFIX
+from models import Player, Match
+from .matchmaking import MatchmakingQueue
+
+LEVELS = ("easy", "medium", "hard")
+
+MATCH_CLAIM_TTL = 3600
+
+PairKey = Tuple[int, int]
+
+
+@dataclass
+class RematchRecord:
+    players: Tuple[Player, Player]
+    level: Optional[str] = None
+
+    def player(self, user_id: int) -> Optional[Player]:
+        return next((player for player in self.players if player.user_id == user_id), None)
+
+    def to_dict(self) -> Dict:
+        return {"players": [asdict(player) for player in self.players], "level": self.level}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RematchRecord':
+        first, second = (Player(**player) for player in data["players"])
+        return cls(players=(first, second), level=data["level"])
+
+
+class StateBackend(ABC):
+    @abstractmethod
+    async def enqueue(self, player: Player, level: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def cancel_queue(self, user_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    async def is_queued(self, user_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    async def pop_pair(self, level: str) -> Optional[Tuple[Player, Player]]:
+        ...
+
+    @abstractmethod
+    async def queue_depths(self) -> Dict[str, int]:
+        ...
+
+    @abstractmethod
+    async def waiting_players(self, level: Optional[str] = None) -> Dict[str, List[Tuple[Player, float]]]:
+        ...
+
+    @abstractmethod
+    async def nearby_players(self, level: str, rating: int, radius: float) -> List[Tuple[Player, float]]:
+        ...
+
+    @abstractmethod
+    async def take_players(self, user_ids: Iterable[int]) -> Optional[List[Tuple[Player, str, float]]]:
+        ...
+
+    @abstractmethod
+    async def next_match_id(self) -> str:
+        ...
+
+    @abstractmethod
+    async def save_match(self, match: Match) -> None:
+        ...
+
+    @abstractmethod
+    async def get_match(self, match_id: str) -> Optional[Match]:
+        ...
+
+    @abstractmethod
+    async def get_player_match(self, user_id: int) -> Optional[Match]:
+        ...
+
+    @abstractmethod
+    async def claim_match(self, match_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def remove_match(self, match: Match) -> None:
+        ...
+
+    @abstractmethod
+    async def active_match_ids(self, match_ids: Iterable[str]) -> Set[str]:
+        ...
+
+    @abstractmethod
+    async def match_count(self) -> int:
+        ...
+
+    @abstractmethod
+    async def open_rematch(self, pair_key: PairKey, record: RematchRecord) -> None:
+        ...
+
+    @abstractmethod
+    async def get_rematch(self, pair_key: PairKey) -> Optional[RematchRecord]:
+        ...
+
+    @abstractmethod
+    async def add_rematch_vote(self, pair_key: PairKey, user_id: int) -> Optional[Tuple[bool, Set[int]]]:
+        ...
+
+    @abstractmethod
+    async def has_rematch_votes(self, pair_key: PairKey) -> bool:
+        ...
+
+    @abstractmethod
+    async def set_rematch_message(self, pair_key: PairKey, user_id: int, message_id: int) -> None:
+        ...
+
+    @abstractmethod
+    async def get_rematch_messages(self, pair_key: PairKey) -> Dict[int, int]:
+        ...
+
+    @abstractmethod
+    async def clear_rematch(self, pair_key: PairKey) -> None:
+        ...
+
+    @abstractmethod
+    async def rematch_count(self) -> int:
+        ...
+
+    @abstractmethod
+    async def list_matches(self) -> List[Match]:
+        ...
+
+    @abstractmethod
+    async def list_rematches(self) -> List[PairKey]:
+        ...
+
+    @abstractmethod
+    async def export_state(self) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    async def import_state(self, data: Dict) -> None:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryStateBackend(StateBackend):
+    def __init__(self):
+        self.queues = MatchmakingQueue(LEVELS)
+        self.active_matches: Dict[str, Match] = {}
+        self.player_matches: Dict[int, str] = {}
+        self.claimed_matches: Set[str] = set()
+        self.rematch_waiting: Dict[PairKey, Set[int]] = {}
+        self.rematch_messages: Dict[PairKey, Dict[int, int]] = {}
+        self.rematch_records: Dict[PairKey, RematchRecord] = {}
+        self._match_counter = 0
+
+    async def enqueue(self, player: Player, level: str) -> bool:
+        return self.queues.enqueue(player, level)
+
+    async def cancel_queue(self, user_id: int) -> bool:
+        return self.queues.cancel(user_id)
+
+    async def is_queued(self, user_id: int) -> bool:
+        return user_id in self.queues
+
+    async def pop_pair(self, level: str) -> Optional[Tuple[Player, Player]]:
+        return self.queues.pop_pair(level)
+
+    async def queue_depths(self) -> Dict[str, int]:
+        return {level: self.queues.depth(level) for level in self.queues.levels()}
+
+    async def waiting_players(self, level: Optional[str] = None) -> Dict[str, List[Tuple[Player, float]]]:
+        levels = [level] if level is not None else list(self.queues.levels())
+        return {level: self.queues.waiting(level) for level in levels}
+
+    async def nearby_players(self, level: str, rating: int, radius: float) -> List[Tuple[Player, float]]:
+        return self.queues.nearby(level, rating, radius)
+
+    async def take_players(self, user_ids: Iterable[int]) -> Optional[List[Tuple[Player, str, float]]]:
+        return self.queues.take(user_ids)
+
+    async def next_match_id(self) -> str:
+        self._match_counter += 1
+        return f"match_{self._match_counter}"
+
+    async def save_match(self, match: Match) -> None:
+        self.active_matches[match.match_id] = match
+        for player in match.players:
+            self.player_matches[player.user_id] = match.match_id
+
+    async def get_match(self, match_id: str) -> Optional[Match]:
+        return self.active_matches.get(match_id)
+
+    async def get_player_match(self, user_id: int) -> Optional[Match]:
+        match_id = self.player_matches.get(user_id)
+        if match_id is None:
+            return None
+        match = self.active_matches.get(match_id)
+        if match is None:
+            del self.player_matches[user_id]
+        return match
+
+    async def claim_match(self, match_id: str) -> bool:
+        if match_id not in self.active_matches or match_id in self.claimed_matches:
+            return False
+        self.claimed_matches.add(match_id)
+        return True
+
+    async def remove_match(self, match: Match) -> None:
+        for player in match.players:
+            if self.player_matches.get(player.user_id) == match.match_id:
+                del self.player_matches[player.user_id]
+        self.active_matches.pop(match.match_id, None)
+        self.claimed_matches.discard(match.match_id)
+
+    async def active_match_ids(self, match_ids: Iterable[str]) -> Set[str]:
+        return {match_id for match_id in match_ids if match_id in self.active_matches}
+
+    async def match_count(self) -> int:
+        return len(self.active_matches)
+
+    async def open_rematch(self, pair_key: PairKey, record: RematchRecord) -> None:
+        self.rematch_records[pair_key] = record
+        self.rematch_messages.setdefault(pair_key, {})
+
+    async def get_rematch(self, pair_key: PairKey) -> Optional[RematchRecord]:
+        return self.rematch_records.get(pair_key)
+
+    async def add_rematch_vote(self, pair_key: PairKey, user_id: int) -> Optional[Tuple[bool, Set[int]]]:
+        if pair_key not in self.rematch_records:
+            return None
+        votes = self.rematch_waiting.setdefault(pair_key, set())
+        if user_id in votes:
+            return False, set(votes)
+        votes.add(user_id)
+        return True, set(votes)
+
+    async def has_rematch_votes(self, pair_key: PairKey) -> bool:
+        return pair_key in self.rematch_waiting
+
+    async def set_rematch_message(self, pair_key: PairKey, user_id: int, message_id: int) -> None:
+        self.rematch_messages.setdefault(pair_key, {})[user_id] = message_id
+
+    async def get_rematch_messages(self, pair_key: PairKey) -> Dict[int, int]:
+        return dict(self.rematch_messages.get(pair_key, {}))
+
+    async def clear_rematch(self, pair_key: PairKey) -> None:
+        self.rematch_waiting.pop(pair_key, None)
+        self.rematch_messages.pop(pair_key, None)
+        self.rematch_records.pop(pair_key, None)
+
+    async def rematch_count(self) -> int:
+        return len(self.rematch_messages)
+
+    async def list_matches(self) -> List[Match]:
+        return [match for match_id, match in self.active_matches.items() if match_id not in self.claimed_matches]
+
+    async def list_rematches(self) -> List[PairKey]:
+        return list(self.rematch_records)
+
+    async def export_state(self) -> Optional[Dict]:
+        return {
+            "match_counter": self._match_counter,
+            "queues": {
+                level: [
+                    {"player": asdict(player), "waited": waited}
+                    for player, waited in self.queues.waiting(level)
+                ]
+                for level in self.queues.levels()
+            },
+            "matches": [match.to_dict() for match in await self.list_matches()],
+            "rematches": [
+                {
+                    "pair": list(pair_key),
+                    "record": record.to_dict(),
+                    "votes": sorted(self.rematch_waiting.get(pair_key, ())),
+                    "messages": {str(user_id): message_id for user_id, message_id in self.rematch_messages.get(pair_key, {}).items()}
+                }
+                for pair_key, record in self.rematch_records.items()
+            ]
+        }
+
+    async def import_state(self, data: Dict) -> None:
+        self.queues = MatchmakingQueue(LEVELS)
+        self.active_matches.clear()
+        self.player_matches.clear()
+        self.claimed_matches.clear()
+        self.rematch_waiting.clear()
+        self.rematch_messages.clear()
+        self.rematch_records.clear()
+        self._match_counter = data["match_counter"]
+        for level, entries in data["queues"].items():
+            if level not in self.queues.levels():
+                continue
+            for entry in entries:
+                self.queues.enqueue(Player(**entry["player"]), level, entry["waited"])
+        for match_data in data["matches"]:
+            await self.save_match(Match.from_dict(match_data))
+        for entry in data["rematches"]:
+            pair_key = tuple(entry["pair"])
+            self.rematch_records[pair_key] = RematchRecord.from_dict(entry["record"])
+            self.rematch_messages[pair_key] = {int(user_id): message_id for user_id, message_id in entry["messages"].items()}
+            if entry["votes"]:
+                self.rematch_waiting[pair_key] = set(entry["votes"])
+
+
+ENQUEUE_SCRIPT = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[3])
+redis.call('HSET', KEYS[4], ARGV[1], ARGV[4])
+redis.call('RPUSH', KEYS[3], ARGV[1])
+redis.call('ZADD', KEYS[5], ARGV[5], ARGV[1])
+return 1
+"""
+
+LEVEL_KEYS_LOOKUP = """
+local function level_keys(level)
+    for i = 1, #LEVELS do
+        if LEVELS[i] == level then
+            return KEYS[3 + i], KEYS[3 + #LEVELS + i]
+        end
+    end
+end
+"""
+
+CANCEL_SCRIPT = """
+local level = redis.call('HGET', KEYS[1], ARGV[1])
+if not level then
+    return 0
+end
+local queue, ratings = level_keys(level)
+if queue then
+    redis.call('LREM', queue, 1, ARGV[1])
+    redis.call('ZREM', ratings, ARGV[1])
+end
+redis.call('HDEL', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+return 1
+"""
+
+POP_PAIR_SCRIPT = """
+if redis.call('LLEN', KEYS[3]) < 2 then
+    return nil
+end
+local first = redis.call('LPOP', KEYS[3])
+local second = redis.call('LPOP', KEYS[3])
+local first_data = redis.call('HGET', KEYS[2], first)
+local second_data = redis.call('HGET', KEYS[2], second)
+redis.call('HDEL', KEYS[1], first, second)
+redis.call('HDEL', KEYS[2], first, second)
+redis.call('HDEL', KEYS[4], first, second)
+redis.call('ZREM', KEYS[5], first, second)
+return {first_data, second_data}
+"""
+
+TAKE_PLAYERS_SCRIPT = """
+for i = 1, #ARGV do
+    if redis.call('HEXISTS', KEYS[1], ARGV[i]) == 0 then
+        return nil
+    end
+end
+local taken = {}
+for i = 1, #ARGV do
+    local level = redis.call('HGET', KEYS[1], ARGV[i])
+    local queue, ratings = level_keys(level)
+    if queue then
+        redis.call('LREM', queue, 1, ARGV[i])
+        redis.call('ZREM', ratings, ARGV[i])
+    end
+    table.insert(taken, level)
+    table.insert(taken, redis.call('HGET', KEYS[2], ARGV[i]))
+    table.insert(taken, redis.call('HGET', KEYS[3], ARGV[i]) or '')
+    redis.call('HDEL', KEYS[1], ARGV[i])
+    redis.call('HDEL', KEYS[2], ARGV[i])
+    redis.call('HDEL', KEYS[3], ARGV[i])
+end
+return taken
+"""
+
+REMOVE_MATCH_SCRIPT = """
+for i = 2, #ARGV do
+    if redis.call('HGET', KEYS[2], ARGV[i]) == ARGV[1] then
+        redis.call('HDEL', KEYS[2], ARGV[i])
+    end
+end
+redis.call('DEL', KEYS[1], KEYS[4])
+redis.call('SREM', KEYS[3], ARGV[1])
+return 1
+"""
+
+CLAIM_MATCH_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+if redis.call('SET', KEYS[2], 1, 'NX', 'EX', ARGV[1]) then
+    return 1
+end
+return 0
+"""
+
+ADD_REMATCH_VOTE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+local added = redis.call('SADD', KEYS[2], ARGV[1])
+local votes = redis.call('SMEMBERS', KEYS[2])
+table.insert(votes, 1, added)
+return votes
+"""
+
+
+class RedisStateBackend(StateBackend):
+    def __init__(self, client, prefix: str = STATE_KEY_PREFIX):
+        self.client = client
+        self.prefix = prefix
+        self._enqueue = client.register_script(ENQUEUE_SCRIPT)
+        self._cancel = client.register_script(self._with_levels(CANCEL_SCRIPT))
+        self._pop_pair = client.register_script(POP_PAIR_SCRIPT)
+        self._take_players = client.register_script(self._with_levels(TAKE_PLAYERS_SCRIPT))
+        self._remove_match = client.register_script(REMOVE_MATCH_SCRIPT)
+        self._claim_match = client.register_script(CLAIM_MATCH_SCRIPT)
+        self._add_rematch_vote = client.register_script(ADD_REMATCH_VOTE_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str) -> 'RedisStateBackend':
+        from redis.asyncio import Redis
+        return cls(Redis.from_url(url, decode_responses=True))
+
+    @staticmethod
+    def _with_levels(script: str) -> str:
+        levels = ", ".join(f"'{level}'" for level in LEVELS)
+        return f"local LEVELS = {{{levels}}}\n{LEVEL_KEYS_LOOKUP}{script}"
+
+    def _key(self, *parts) -> str:
+        return ":".join((f"{{{self.prefix}}}",) + tuple(str(part) for part in parts))
+
+    def _queue_keys(self) -> List[str]:
+        return [self._key("queue", level) for level in LEVELS] + [self._key("queue_rating", level) for level in LEVELS]
+
+    def _pair(self, pair_key: PairKey) -> str:
+        return f"{pair_key[0]}_{pair_key[1]}"
+
+    async def enqueue(self, player: Player, level: str) -> bool:
+        added = await self._enqueue(
+            keys=[
+                self._key("queued"),
+                self._key("queue_players"),
+                self._key("queue", level),
+                self._key("queue_since"),
+                self._key("queue_rating", level)
+            ],
+            args=[player.user_id, level, json.dumps(asdict(player)), time.time(), player.rating]
+        )
+        return bool(added)
+
+    async def cancel_queue(self, user_id: int) -> bool:
+        removed = await self._cancel(
+            keys=[self._key("queued"), self._key("queue_players"), self._key("queue_since")] + self._queue_keys(),
+            args=[user_id]
+        )
+        return bool(removed)
+
+    async def is_queued(self, user_id: int) -> bool:
+        return bool(await self.client.hexists(self._key("queued"), user_id))
+
+    async def pop_pair(self, level: str) -> Optional[Tuple[Player, Player]]:
+        pair = await self._pop_pair(
+            keys=[
+                self._key("queued"),
+                self._key("queue_players"),
+                self._key("queue", level),
+                self._key("queue_since"),
+                self._key("queue_rating", level)
+            ]
+        )
+        if not pair:
+            return None
+        first, second = (Player(**json.loads(data)) for data in pair)
+        return first, second
+
+    async def queue_depths(self) -> Dict[str, int]:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for level in LEVELS:
+                pipe.llen(self._key("queue", level))
+            depths = await pipe.execute()
+        return dict(zip(LEVELS, depths))
+
+    async def waiting_players(self, level: Optional[str] = None) -> Dict[str, List[Tuple[Player, float]]]:
+        levels = [level] if level is not None else list(LEVELS)
+        async with self.client.pipeline(transaction=False) as pipe:
+            for name in levels:
+                pipe.lrange(self._key("queue", name), 0, -1)
+            pipe.hgetall(self._key("queue_players"))
+            pipe.hgetall(self._key("queue_since"))
+            *queues, players, since = await pipe.execute()
+
+        now = time.time()
+        waiting = {}
+        for name, user_ids in zip(levels, queues):
+            waiting[name] = [
+                (Player(**json.loads(players[user_id])), now - float(since[user_id]) if user_id in since else 0.0)
+                for user_id in user_ids if user_id in players
+            ]
+        return waiting
+
+    async def nearby_players(self, level: str, rating: int, radius: float) -> List[Tuple[Player, float]]:
+        user_ids = await self.client.zrangebyscore(self._key("queue_rating", level), rating - radius, rating + radius)
+        if not user_ids:
+            return []
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.hmget(self._key("queue_players"), user_ids)
+            pipe.hmget(self._key("queue_since"), user_ids)
+            players, since = await pipe.execute()
+
+        now = time.time()
+        return [
+            (Player(**json.loads(data)), now - float(enqueued) if enqueued else 0.0)
+            for data, enqueued in zip(players, since) if data
+        ]
+
+    async def take_players(self, user_ids: Iterable[int]) -> Optional[List[Tuple[Player, str, float]]]:
+        taken = await self._take_players(
+            keys=[self._key("queued"), self._key("queue_players"), self._key("queue_since")] + self._queue_keys(),
+            args=list(dict.fromkeys(user_ids))
+        )
+        if not taken:
+            return None
+        now = time.time()
+        return [
+            (Player(**json.loads(data)), level, now - float(since) if since else 0.0)
+            for level, data, since in zip(taken[0::3], taken[1::3], taken[2::3])
+        ]
+
+    async def next_match_id(self) -> str:
+        return f"match_{await self.client.incr(self._key('match_counter'))}"
+
+    async def save_match(self, match: Match) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(self._key("match", match.match_id), json.dumps(match.to_dict()))
+            pipe.sadd(self._key("matches"), match.match_id)
+            pipe.hset(self._key("player_match"), mapping={
+                player.user_id: match.match_id for player in match.players
+            })
+            await pipe.execute()
+
+    async def get_match(self, match_id: str) -> Optional[Match]:
+        data = await self.client.get(self._key("match", match_id))
+        return Match.from_dict(json.loads(data)) if data else None
+
+    async def get_player_match(self, user_id: int) -> Optional[Match]:
+        match_id = await self.client.hget(self._key("player_match"), user_id)
+        if match_id is None:
+            return None
+        match = await self.get_match(match_id)
+        if match is None:
+            await self.client.hdel(self._key("player_match"), user_id)
+        return match
+
+    async def claim_match(self, match_id: str) -> bool:
+        claimed = await self._claim_match(
+            keys=[self._key("match", match_id), self._key("match_claim", match_id)],
+            args=[MATCH_CLAIM_TTL]
+        )
+        return bool(claimed)
+
+    async def remove_match(self, match: Match) -> None:
+        await self._remove_match(
+            keys=[
+                self._key("match", match.match_id),
+                self._key("player_match"),
+                self._key("matches"),
+                self._key("match_claim", match.match_id)
+            ],
+            args=[match.match_id] + [player.user_id for player in match.players]
+        )
+
+    async def active_match_ids(self, match_ids: Iterable[str]) -> Set[str]:
+        match_ids = list(match_ids)
+        if not match_ids:
+            return set()
+        async with self.client.pipeline(transaction=False) as pipe:
+            for match_id in match_ids:
+                pipe.exists(self._key("match", match_id))
+            found = await pipe.execute()
+        return {match_id for match_id, exists in zip(match_ids, found) if exists}
+
+    async def match_count(self) -> int:
+        return await self.client.scard(self._key("matches"))
+
+    async def open_rematch(self, pair_key: PairKey, record: RematchRecord) -> None:
+        pair = self._pair(pair_key)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.sadd(self._key("rematches"), pair)
+            pipe.set(self._key("rematch", pair), json.dumps(record.to_dict()))
+            await pipe.execute()
+
+    async def get_rematch(self, pair_key: PairKey) -> Optional[RematchRecord]:
+        data = await self.client.get(self._key("rematch", self._pair(pair_key)))
+        return RematchRecord.from_dict(json.loads(data)) if data else None
+
+    async def add_rematch_vote(self, pair_key: PairKey, user_id: int) -> Optional[Tuple[bool, Set[int]]]:
+        pair = self._pair(pair_key)
+        result = await self._add_rematch_vote(
+            keys=[self._key("rematch", pair), self._key("rematch_votes", pair)],
+            args=[user_id]
+        )
+        if not result:
+            return None
+        added, *votes = result
+        return bool(added), {int(vote) for vote in votes}
+
+    async def has_rematch_votes(self, pair_key: PairKey) -> bool:
+        return bool(await self.client.exists(self._key("rematch_votes", self._pair(pair_key))))
+
+    async def set_rematch_message(self, pair_key: PairKey, user_id: int, message_id: int) -> None:
+        await self.client.hset(self._key("rematch_messages", self._pair(pair_key)), user_id, message_id)
+
+    async def get_rematch_messages(self, pair_key: PairKey) -> Dict[int, int]:
+        messages = await self.client.hgetall(self._key("rematch_messages", self._pair(pair_key)))
+        return {int(user_id): int(message_id) for user_id, message_id in messages.items()}
+
+    async def clear_rematch(self, pair_key: PairKey) -> None:
+        pair = self._pair(pair_key)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.srem(self._key("rematches"), pair)
+            pipe.delete(
+                self._key("rematch_votes", pair),
+                self._key("rematch_messages", pair),
+                self._key("rematch", pair)
+            )
+            await pipe.execute()
+
+    async def rematch_count(self) -> int:
+        return await self.client.scard(self._key("rematches"))
+
+    async def list_matches(self) -> List[Match]:
+        match_ids = sorted(await self.client.smembers(self._key("matches")))
+        if not match_ids:
+            return []
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.mget([self._key("match", match_id) for match_id in match_ids])
+            pipe.mget([self._key("match_claim", match_id) for match_id in match_ids])
+            matches, claims = await pipe.execute()
+        return [Match.from_dict(json.loads(data)) for data, claim in zip(matches, claims) if data and not claim]
+
+    async def list_rematches(self) -> List[PairKey]:
+        pairs = await self.client.smembers(self._key("rematches"))
+        return [tuple(int(user_id) for user_id in pair.split("_")) for pair in sorted(pairs)]
+
+    async def export_state(self) -> Optional[Dict]:
+        return None
+
+    async def import_state(self, data: Dict) -> None:
+        pass
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_state_backend(backend: str = STATE_BACKEND) -> StateBackend:
+    if backend == "redis":
+        return RedisStateBackend.from_url(REDIS_URL)
+    if backend != "memory":
+        raise ValueError(f"Unknown state backend: {backend}")
+    return InMemoryStateBackend()
+
+
+state = create_state_backend()
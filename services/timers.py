@@ -0,0 +1,93 @@
+import asyncio
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+from config import TIMER_CADENCE, TIMER_TICK_SECONDS, TIMER_MAX_EDITS_PER_TICK
+from .outbound import outbound, PRIORITY_TIMER
+from .state import state
+
+
+def format_time(seconds: int) -> str:
+    minutes = seconds // 60
+    seconds = seconds % 60
+    return f"{minutes} мин. {seconds} сек." if minutes > 0 else f"{seconds} сек."
+
+
+def quantize_remaining(remaining: float, cadence: List[Tuple[int, int]] = TIMER_CADENCE) -> int:
+    for threshold, step in cadence:
+        if remaining > threshold:
+            return int(math.ceil(remaining / step) * step)
+    return int(math.ceil(remaining))
+
+
+class TimerRenderer:
+    def __init__(self, tick: float = TIMER_TICK_SECONDS, max_edits_per_tick: int = TIMER_MAX_EDITS_PER_TICK):
+        self.tick = tick
+        self.max_edits_per_tick = max_edits_per_tick
+        self.edits_sent = 0
+        self.edits_skipped = 0
+        self._matches: Dict[str, object] = {}
+        self._rendered: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._matches)
+
+    def render(self, match) -> str:
+        remaining = max(0.0, match.timeout_duration - (time.time() - match.start_time))
+        return format_time(quantize_remaining(remaining))
+
+    def register(self, match) -> None:
+        self._matches[match.match_id] = match
+        self._rendered[match.match_id] = format_time(match.timeout_duration)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def unregister(self, match_id: str) -> None:
+        self._matches.pop(match_id, None)
+        self._rendered.pop(match_id, None)
+
+    def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    async def _run(self):
+        try:
+            while self._matches:
+                await asyncio.sleep(self.tick)
+                await self._render_due()
+        except asyncio.CancelledError:
+            pass
+
+    async def _render_due(self) -> None:
+        due = []
+        for match_id, match in list(self._matches.items()):
+            if match.answered:
+                self.unregister(match_id)
+                continue
+            time_str = self.render(match)
+            if time_str == self._rendered.get(match_id):
+                self.edits_skipped += 1
+                continue
+            due.append((match_id, match, time_str))
+            if len(due) * 2 >= self.max_edits_per_tick:
+                break
+
+        active = await state.active_match_ids(match_id for match_id, _, _ in due) if due else set()
+        for match_id, match, time_str in due:
+            if match_id not in active:
+                self.unregister(match_id)
+                continue
+            self._rendered[match_id] = time_str
+            for user_id, message_id in match.timer_messages.items():
+                outbound.edit_message_text(
+                    f"⏱ Осталось времени: {time_str}",
+                    chat_id=user_id,
+                    message_id=message_id,
+                    priority=PRIORITY_TIMER
+                )
+                self.edits_sent += 1
+
+
+timer_renderer = TimerRenderer()
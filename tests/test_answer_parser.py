@@ -0,0 +1,64 @@
+from fractions import Fraction
+import pytest
+from models.answer_parser import MAX_ANSWER_LENGTH, parse_answer
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("42", Fraction(42)),
+    ("-3/4", Fraction(-3, 4)),
+    ("0,25", Fraction(1, 4)),
+    ("12.5%", Fraction(1, 8)),
+    ("1e3", Fraction(1000)),
+    ("2.5e-2", Fraction(1, 40)),
+    ("2^10", Fraction(1024)),
+    ("5!", Fraction(120)),
+    ("(1+2)*3", Fraction(9)),
+])
+def test_parses_numbers_and_expressions(text, expected):
+    assert parse_answer(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("C(5,2)", Fraction(10)),
+    ("с(12, 2)", Fraction(66)),
+    ("A(5,2)", Fraction(20)),
+    ("C(1000,0)", Fraction(1)),
+    ("C(2+3, 1*2)", Fraction(10)),
+])
+def test_evaluates_combinatorial_functions(text, expected):
+    assert parse_answer(text) == expected
+
+
+def test_keeps_probabilities_as_exact_rationals():
+    assert parse_answer("C(5,2)/C(12,2)") == Fraction(5, 33)
+    assert parse_answer("C(5,2)/C(12,2)") == parse_answer("5/33")
+    assert parse_answer("1/3 + 1/6") == Fraction(1, 2)
+
+
+@pytest.mark.parametrize("text", [
+    "1e999999",
+    "1e10",
+    "1e-10",
+    "1" * 19,
+    "2^33",
+    "2^0.5",
+    "(2^32)^32",
+    "101!",
+    "1.5!",
+    "C(1001,2)",
+    "C(2,3)",
+    "C(5,-1)",
+    "C(5.5,2)",
+    "1/0",
+    "1/(1-1)",
+    "0^-1",
+    "((((((((1))))))))",
+    "1" + "+1" * (MAX_ANSWER_LENGTH // 2),
+])
+def test_rejects_out_of_range_input(text):
+    assert parse_answer(text) is None
+
+
+@pytest.mark.parametrize("text", [None, "", "   ", "abc", "1+", "C(5)", "(1", "1 2", "."])
+def test_rejects_malformed_input(text):
+    assert parse_answer(text) is None
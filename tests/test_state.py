@@ -0,0 +1,152 @@
+import asyncio
+import pytest
+from models import Player, Match
+from services.state import StateBackend, InMemoryStateBackend, RedisStateBackend, RematchRecord
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def redis_backend() -> RedisStateBackend:
+    return RedisStateBackend(fakeredis.FakeAsyncRedis(decode_responses=True), prefix="test")
+
+
+def player(user_id: int, rating: int = 0) -> Player:
+    return Player(user_id=user_id, username=f"user{user_id}", rating=rating)
+
+
+def test_incomplete_backend_fails_on_instantiation():
+    class Incomplete(StateBackend):
+        async def enqueue(self, player, level):
+            return True
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    InMemoryStateBackend()
+
+
+def test_pop_pair_never_hands_out_a_player_twice():
+    async def scenario():
+        backend = redis_backend()
+        for user_id in range(1, 21):
+            assert await backend.enqueue(player(user_id), "easy")
+        assert not await backend.enqueue(player(1), "medium")
+
+        pairs = await asyncio.gather(*(backend.pop_pair("easy") for _ in range(15)))
+        paired = [p.user_id for pair in pairs if pair for p in pair]
+        assert sorted(paired) == list(range(1, 21))
+        assert sum(pair is None for pair in pairs) == 5
+        assert await backend.queue_depths() == {"easy": 0, "medium": 0, "hard": 0}
+        assert not await backend.is_queued(1)
+        await backend.close()
+
+    run(scenario())
+
+
+def test_take_players_is_all_or_nothing():
+    async def scenario():
+        backend = redis_backend()
+        await backend.enqueue(player(1), "easy")
+        await backend.enqueue(player(2), "medium")
+        await backend.enqueue(player(3), "medium")
+
+        assert await backend.take_players([1, 4]) is None
+        assert await backend.is_queued(1)
+
+        results = await asyncio.gather(backend.take_players([1, 2]), backend.take_players([2, 3]))
+        taken = [result for result in results if result is not None]
+        assert len(taken) == 1
+        assert {p.user_id for p, _, _ in taken[0]} in ({1, 2}, {2, 3})
+        assert sum((await backend.queue_depths()).values()) == 1
+        assert not await backend.is_queued(2)
+
+        remaining = ({1, 2, 3} - {p.user_id for p, _, _ in taken[0]}).pop()
+        assert await backend.cancel_queue(remaining)
+        assert sum((await backend.queue_depths()).values()) == 0
+        await backend.close()
+
+    run(scenario())
+
+
+def test_claim_match_settles_exactly_once():
+    async def scenario():
+        backend = redis_backend()
+        first, second = player(1), player(2)
+        match = Match(match_id=await backend.next_match_id(), players=(first, second), level="easy")
+        await backend.save_match(match)
+
+        claims = await asyncio.gather(*(backend.claim_match(match.match_id) for _ in range(10)))
+        assert claims.count(True) == 1
+        assert await backend.list_matches() == []
+
+        await backend.remove_match(match)
+        assert not await backend.claim_match(match.match_id)
+        assert await backend.client.keys("*match_claim*") == []
+        assert await backend.get_player_match(1) is None
+        await backend.close()
+
+    run(scenario())
+
+
+def test_rematch_votes_are_counted_once():
+    async def scenario():
+        backend = redis_backend()
+        pair_key = (1, 2)
+        await backend.open_rematch(pair_key, RematchRecord(players=(player(1), player(2)), level="easy"))
+
+        votes = await asyncio.gather(
+            backend.add_rematch_vote(pair_key, 1),
+            backend.add_rematch_vote(pair_key, 2),
+            backend.add_rematch_vote(pair_key, 1)
+        )
+        assert [added for added, _ in votes].count(True) == 2
+        assert sum(1 for added, seen in votes if added and seen == {1, 2}) == 1
+
+        await backend.clear_rematch(pair_key)
+        assert not await backend.has_rematch_votes(pair_key)
+        assert await backend.rematch_count() == 0
+        await backend.close()
+
+    run(scenario())
+
+
+def test_nearby_players_reads_only_the_rating_window():
+    async def scenario():
+        backend = redis_backend()
+        for user_id, rating in ((1, 0), (2, 30), (3, 60), (4, 900)):
+            await backend.enqueue(player(user_id, rating), "easy")
+
+        nearby = await backend.nearby_players("easy", 30, 30)
+        assert sorted(p.user_id for p, _ in nearby) == [1, 2, 3]
+
+        await backend.take_players([1, 2])
+        await backend.cancel_queue(4)
+        assert [p.user_id for p, _ in await backend.nearby_players("easy", 0, 1000)] == [3]
+        await backend.pop_pair("easy")
+        await backend.enqueue(player(5, 70), "easy")
+        await backend.pop_pair("easy")
+        assert await backend.nearby_players("easy", 0, 1000) == []
+        await backend.close()
+
+    run(scenario())
+
+
+def test_rematch_vote_after_expiry_is_rejected():
+    async def scenario():
+        backend = redis_backend()
+        pair_key = (1, 2)
+        assert await backend.add_rematch_vote(pair_key, 1) is None
+        assert not await backend.has_rematch_votes(pair_key)
+
+        await backend.open_rematch(pair_key, RematchRecord(players=(player(1), player(2))))
+        assert await backend.add_rematch_vote(pair_key, 1) == (True, {1})
+        await backend.clear_rematch(pair_key)
+        assert await backend.add_rematch_vote(pair_key, 2) is None
+        assert not await backend.has_rematch_votes(pair_key)
+        await backend.close()
+
+    run(scenario())